@@ -1,89 +1,376 @@
 import logging
+import os
 import time
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 import re
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.common.exceptions import InvalidSessionIdException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.action_chains import ActionChains
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+import metrics
+from browser import DriverPool
+from http_client import HostRateLimiter, backoff_delay, create_session, fetch_html_with_retries, map_concurrently
+from parsers import parse_animax_days, parse_animax_thumbnail
+from programs import Program, sheet_rows
+from resource_blocking import batch_report, page_report
+from sheet_sync import write_sheets
+from sources import Source, register
+from thumbnail_cache import ThumbnailCache
+from waits import click_until_changed
 
 # 設定
 SPREADSHEET_ID = "1lkshTdrk5gVUpSUe9-xTpq438xQQh_SBGcKXfBboH7s"
 SERVICE_ACCOUNT_FILE = "credentials1.json"
 SHEET_NAME = "アニマックス"
+SHEET_HEADER = ["日付", "時間", "タイトル", "話数", "サムネURL"]
+SHEET_COLUMNS = ("date", "time", "title", "episode", "image_url")  # SHEET_HEADER に対応する Program の属性
 URL = "https://www.animax.co.jp/programs/schedule_weekly"
+FETCH_DAYS = int(os.environ.get("ANIMAX_DAYS", "7"))  # 今日から何日分を取得するか
+SLOTS_PER_DAY = 48  # 日ごとの列を読み取れなかった場合に1日分とみなす番組数
+
+# サムネイル取得の並列度・レート制限
+THUMBNAIL_CONCURRENCY = int(os.environ.get("ANIMAX_THUMBNAIL_CONCURRENCY", "8"))  # HTTP同時接続数
+THUMBNAIL_RATE_LIMIT = float(os.environ.get("ANIMAX_THUMBNAIL_RATE_LIMIT", "5"))  # 1ホストあたりの毎秒リクエスト数
+THUMBNAIL_TAB_POOL = int(os.environ.get("ANIMAX_THUMBNAIL_TABS", "4"))  # ブラウザ取得時の同時タブ数
+THUMBNAIL_RETRIES = int(os.environ.get("ANIMAX_THUMBNAIL_RETRIES", "2"))  # ブラウザ取得に失敗したページの再試行回数
+
+# サムネURLの永続キャッシュ
+THUMBNAIL_CACHE_FILE = os.environ.get("ANIMAX_THUMBNAIL_CACHE", "thumbnail_cache.sqlite3")
+THUMBNAIL_CACHE_TTL = int(os.environ.get("ANIMAX_THUMBNAIL_CACHE_TTL", str(14 * 24 * 60 * 60)))  # 秒
+# サムネが無かった番組を取得し直すまでの秒数
+THUMBNAIL_CACHE_NEGATIVE_TTL = int(os.environ.get("ANIMAX_THUMBNAIL_CACHE_NEGATIVE_TTL", str(2 * 24 * 60 * 60)))
+
+WEEKDAY_MAP = {
+    0: '月',  # Monday
+    1: '火',
+    2: '水',
+    3: '木',
+    4: '金',
+    5: '土',
+    6: '日'
+}
 
 # ログ設定
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s [%(levelname)s] %(message)s")
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "DEBUG"), format="%(asctime)s [%(levelname)s] %(message)s")
 
-def fetch_thumbnail_url(driver, program_url):
+def fetch_thumbnail_url_http(session, limiter, program_url):
     """
-    番組URLにアクセスしてサムネイル画像のURLを取得する関数
+    ブラウザを使わずにHTTPで番組詳細ページを取得してサムネURLを返す関数
+    ページにサムネが無かった場合は空文字、ページを取得できなかった場合は None を返す
     """
-    thumbnail_url = ''
     try:
-        # 新しいタブを開く
-        driver.execute_script("window.open('');")
-        driver.switch_to.window(driver.window_handles[1])
-        driver.get(program_url)
+        html = fetch_html_with_retries(session, program_url, limiter=limiter)
+        thumbnail_url = parse_animax_thumbnail(html)
+        if thumbnail_url:
+            logging.debug(f"サムネURL取得(HTTP): {thumbnail_url}")
+        return thumbnail_url
+    except Exception as e:
+        logging.debug(f"HTTPでのサムネURL取得に失敗しました ({program_url}): {e}")
+        return None
+
+def is_driver_crash(error):
+    """WebDriver（Chrome）自体が応答しなくなったことを示すエラーかどうかを判定する関数"""
+    if isinstance(error, (InvalidSessionIdException, ConnectionError)):
+        return True
+    message = str(error).lower()
+    return any(text in message for text in (
+        "chrome not reachable", "disconnected", "session deleted", "no such session", "max retries exceeded",
+    ))
+
+def fetch_tab_batch(driver, batch, results=None):
+    """
+    batch の番組詳細ページをタブでまとめて開いてサムネURLを取得する関数
+    戻り値: ({番組URL: サムネURL}, [取得に失敗した番組URL])
+    results を渡すと取得できたものをその都度追加する
+    WebDriver自体が応答しなくなった場合は例外をそのまま送出する（results にはそれまでに取得できた分が残る）
+    """
+    results = {} if results is None else results
+    failed = []
+    main_handle = driver.current_window_handle
+    opened = []
+    try:
+        # バッチ分のタブをまとめて開き、読み込みを並行させる
+        for program_url in batch:
+            before = set(driver.window_handles)
+            driver.execute_script("window.open(arguments[0], '_blank');", program_url)
+            new_handles = set(driver.window_handles) - before
+            if new_handles:
+                opened.append((program_url, new_handles.pop()))
+            else:
+                failed.append(program_url)
+
+        for program_url, handle in opened:
+            try:
+                driver.switch_to.window(handle)
+                with metrics.timed("animax.thumbnail_tab_wait"):
+                    WebDriverWait(driver, 20).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "div.p-detail-block.block-thumbnail.pc-order-1"))
+                    )
+                page_report(driver, "animax_detail", network=False)
+                thumbnail_url = parse_animax_thumbnail(driver.page_source)
+            except Exception as e:
+                if is_driver_crash(e):
+                    raise
+                logging.warning(f"サムネURL取得中にエラーが発生しました ({program_url}): {e}")
+                metrics.incr("animax.thumbnail_errors")
+                failed.append(program_url)
+                continue
+
+            metrics.incr("animax.thumbnails_browser" if thumbnail_url else "animax.thumbnails_missing")
+            if thumbnail_url:
+                logging.debug(f"サムネURL取得(タブ): {thumbnail_url}")
+            else:
+                logging.warning(f"サムネイル画像が見つかりませんでした: {program_url}")
+            results[program_url] = thumbnail_url
+        batch_report(driver, "animax_detail", len(opened))
+    finally:
+        # 開いたタブを閉じて元のタブに戻る（WebDriverが落ちている場合は何もしない）
+        for _, handle in opened:
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception:
+                pass
+        try:
+            driver.switch_to.window(main_handle)
+        except Exception:
+            pass
+    return results, failed
 
-        # ページが完全に読み込まれるまで待機
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div.p-detail-block.block-thumbnail.pc-order-1"))
-        )
+def fetch_thumbnail_urls_with_tabs(driver, program_urls, tabs=THUMBNAIL_TAB_POOL, restart_driver=None, on_result=None):
+    """
+    複数のタブで番組詳細ページを同時に開いてサムネURLを取得する関数
+    （HTTPで取得できなかったページ用のフォールバック）
+    失敗したページは最大 THUMBNAIL_RETRIES 回まで間隔を空けて再試行し、
+    WebDriverが応答しなくなった場合は restart_driver(driver) で起動し直して続ける
+    on_result: 取得できるたびに (番組URL, サムネURL) で呼ばれる（途中結果の保存用）
+    """
+    results = {}
+    pending = list(program_urls)
+    step = max(1, tabs)
+    for attempt in range(THUMBNAIL_RETRIES + 1):
+        if attempt:
+            delay = backoff_delay(attempt - 1)
+            logging.info(f"取得に失敗した {len(pending)} 件を{delay:.1f}秒後に再試行します ({attempt}/{THUMBNAIL_RETRIES})")
+            metrics.incr("animax.thumbnail_retries", len(pending))
+            time.sleep(delay)
+
+        failed = []
+        for start in range(0, len(pending), step):
+            batch = pending[start:start + step]
+            if driver is None:
+                failed.extend(batch)
+                continue
+            batch_results = {}
+            try:
+                _, batch_failed = fetch_tab_batch(driver, batch, batch_results)
+            except Exception as e:
+                if not is_driver_crash(e):
+                    raise
+                logging.error(f"ブラウザが応答しなくなりました: {e}")
+                # 落ちる前に取得できた分は残し、それ以外を再試行する
+                batch_failed = [url for url in batch if url not in batch_results]
+                try:
+                    driver = restart_driver(driver) if restart_driver else None
+                except Exception as restart_error:
+                    logging.error(f"WebDriverを再起動できませんでした: {restart_error}")
+                    driver = None
+
+            failed.extend(batch_failed)
+            results.update(batch_results)
+            if on_result:
+                for program_url, thumbnail_url in batch_results.items():
+                    on_result(program_url, thumbnail_url)
+
+        pending = failed
+        if not pending or driver is None:
+            break
+
+    if pending:
+        metrics.incr("animax.thumbnail_failures", len(pending))
+        logging.warning(f"{len(pending)} 件のサムネURLを取得できませんでした（次回の実行で再取得します）。")
+    return results
+
+def fetch_thumbnail_urls(driver, program_urls, cache=None, restart_driver=None, session=None):
+    """
+    番組URLのリストに対してサムネURLを並列取得し、{番組URL: サムネURL} を返す関数
+    キャッシュにあるものはそれを使い、残りをHTTPで並列取得し、
+    ページを取得できなかったものだけブラウザのタブプールで取得する
+    取得結果はその都度キャッシュに保存するので、途中で失敗しても再実行時は続きから取得できる
+    （サムネが無かったページも空文字として保存し、毎回取得し直さない）
+    session: 共有する requests.Session（省略時はこの呼び出し用に作成して閉じる）
+    """
+    unique_urls = list(dict.fromkeys(url for url in program_urls if url))
+    if not unique_urls:
+        return {}
+
+    cached = {}
+    if cache is not None:
+        for url in unique_urls:
+            thumbnail_url = cache.get(url)
+            if thumbnail_url is not None:
+                cached[url] = thumbnail_url
+    to_fetch = [url for url in unique_urls if url not in cached]
+    if not to_fetch:
+        return cached
+
+    own_session = session is None
+    if own_session:
+        session = create_session(pool_size=THUMBNAIL_CONCURRENCY)
+    limiter = HostRateLimiter(THUMBNAIL_RATE_LIMIT)
+    def fetch_http(url):
+        thumbnail_url = fetch_thumbnail_url_http(session, limiter, url)
+        if cache is not None:
+            cache.set(url, thumbnail_url)
+        return thumbnail_url
 
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+    try:
+        results = map_concurrently(fetch_http, to_fetch, THUMBNAIL_CONCURRENCY)
+    finally:
+        if own_session:
+            session.close()
+        if cache is not None:
+            cache.checkpoint()
+
+    missing = [url for url in to_fetch if results.get(url) is None]
+    found = sum(1 for url in to_fetch if results.get(url))
+    metrics.incr("animax.thumbnails_http", found)
+    metrics.incr("animax.thumbnails_missing", len(to_fetch) - len(missing) - found)
+    logging.info(f"サムネURL取得(HTTP): {found}/{len(to_fetch)} 件 "
+                 f"(サムネ無し {len(to_fetch) - len(missing) - found} 件・キャッシュ済み {len(cached)} 件)")
+
+    if missing and driver is not None:
+        logging.info(f"ブラウザで {len(missing)} 件のサムネURLを取得します。")
+        try:
+            results.update(fetch_thumbnail_urls_with_tabs(
+                driver, missing, restart_driver=restart_driver, on_result=cache.set if cache is not None else None,
+            ))
+        finally:
+            if cache is not None:
+                cache.checkpoint()
+
+    results.update(cached)
+    return {url: results.get(url) or '' for url in unique_urls}
+
+@lru_cache(maxsize=None)
+def format_date(date_obj):
+    """日付を番組表の表記（例: "4月14日(月)"）に変換する関数（同じ日付は同じ文字列を返す）"""
+    return f"{date_obj.month}月{date_obj.day}日({WEEKDAY_MAP[date_obj.weekday()]})"
+
+def to_date(value):
+    """datetime が渡された場合は date に変換する関数"""
+    return value.date() if isinstance(value, datetime) else value
+
+def parse_day_label(label, today):
+    """
+    日付見出し（例: "4月14日(月)"）を date に変換する関数
+    年は今日に最も近い年とみなす（年末年始をまたぐ週のため）。読み取れなければ None
+    """
+    match = re.search(r"(\d{1,2})月(\d{1,2})日", label)
+    if not match:
+        return None
+    month, day = int(match.group(1)), int(match.group(2))
+    year = today.year
+    if month - today.month > 6:
+        year -= 1
+    elif today.month - month > 6:
+        year += 1
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
 
-        # 指定されたHTML構造からサムネイル画像を取得
-        img_tag = soup.select_one('div.p-detail-block.block-thumbnail.pc-order-1 figure.p-detail-img img')
-        if img_tag and 'src' in img_tag.attrs:
-            thumbnail_url = img_tag['src']
-            logging.debug(f"サムネURL取得: {thumbnail_url}")
-        else:
-            logging.warning(f"サムネイル画像が見つかりませんでした: {program_url}")
+def assign_dates(day_labels, day_cells, today):
+    """
+    日ごとの列に日付見出しの日付を割り当て、[(日付, セルのリスト), ...] を返す関数
+    見出しと列を対応付けられない場合は、今日から48件ごとに日付を割り当てる
+    """
+    dates = [parse_day_label(label, today) for label in day_labels]
+    if day_cells and len(dates) == len(day_cells) and all(dates):
+        return list(zip(dates, day_cells))
+
+    logging.warning(
+        f"日付見出し({len(dates)}件)と番組表の列({len(day_cells)}列)を対応付けられないため、"
+        f"{SLOTS_PER_DAY}件ごとに日付を割り当てます。"
+    )
+    metrics.incr("animax.date_fallback")
+    cells = [cell for column in day_cells for cell in column]
+    return [
+        (to_date(today) + timedelta(days=offset // SLOTS_PER_DAY), cells[offset:offset + SLOTS_PER_DAY])
+        for offset in range(0, len(cells), SLOTS_PER_DAY)
+    ]
+
+def select_days(dated_cells, today, days=None):
+    """今日から days 日分（省略時は ANIMAX_DAYS）の列だけを残す関数"""
+    days = FETCH_DAYS if days is None else days
+    start = to_date(today)
+    end = start + timedelta(days=days)
+    return [(day, cells) for day, cells in dated_cells if start <= day < end]
+
+def build_programs(dated_cells):
+    """
+    日付ごとの番組セルの生データから番組データを組み立てる関数
+    戻り値: Program のリスト（サムネURLは未設定）
+    """
+    programs = []
+    for day, cells in dated_cells:
+        date_str = format_date(day)
+        for index, cell in enumerate(cells, start=1):
+            try:
+                program_url = cell['href']
+                if program_url and not program_url.startswith('http'):
+                    program_url = "https://www.animax.co.jp" + program_url  # 相対URLを絶対URLに変換
 
-    except Exception as e:
-        logging.error(f"サムネURL取得中にエラーが発生しました: {e}")
-    finally:
-        # タブを閉じて元のタブに戻る
-        driver.close()
-        driver.switch_to.window(driver.window_handles[0])
+                programs.append(Program(
+                    channel=SHEET_NAME,
+                    date=date_str,
+                    time=cell['time'],
+                    title=cell['title'],
+                    episode=cell['episode'],
+                    url=program_url,  # サムネURLは後でまとめて取得
+                ))
+
+            except Exception as e:
+                logging.warning(f"番組データ解析エラー ({date_str} {index}番目): {e}")
+    return programs
 
-    return thumbnail_url
+def parse_animax_schedule(html, today, days=None):
+    """
+    週間番組表ページのHTMLから、today（date。datetime も可）から days 日分の番組データを取り出す関数（ブラウザ不要）
+    """
+    with metrics.timed("animax.parse"):
+        day_labels, day_cells = parse_animax_days(html)
+        logging.debug(f"日付見出し: {day_labels} / 列ごとの番組セル数: {[len(cells) for cells in day_cells]}")
+        dated_cells = select_days(assign_dates(day_labels, day_cells, today), today, days)
+        programs = build_programs(dated_cells)
+    logging.info(f"取得対象の日付: {', '.join(format_date(day) for day, _ in dated_cells) or 'なし'}")
+    metrics.incr("animax.programs", len(programs))
+    return programs
 
-def fetch_animax_schedule(driver):
+def fetch_animax_schedule(driver, cache=None, days=None, restart_driver=None, session=None):
     """
-    アニマックスの番組表から番組を取得し、48件ごとに日付を割り当てる関数
+    アニマックスの番組表から今日から ANIMAX_DAYS 日分の番組を取得する関数
+    日付は番組表の日ごとの列と日付見出しから割り当てる
+    restart_driver: サムネ取得中にWebDriverが落ちた場合に起動し直す関数（DriverPool.restart など）
+    session: サムネ取得に使う requests.Session（省略時は取得ごとに作成する）
     """
     programs = []
 
     try:
-        driver.get(URL)
         logging.info("ページ読み込み開始")
+        with metrics.timed("animax.page_load"):
+            driver.get(URL)
 
-        # ページが完全に読み込まれるまで待機
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.ID, "js-program-contents-weekly"))
-        )
+            # ページが完全に読み込まれるまで待機
+            WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.ID, "js-program-contents-weekly"))
+            )
+        page_report(driver, "animax")
 
         # 現在の日付を取得 (例: "4月14日(月)")
         today = datetime.now()
-        weekday_map = {
-            0: '月',  # Monday
-            1: '火',
-            2: '水',
-            3: '木',
-            4: '金',
-            5: '土',
-            6: '日'
-        }
-        today_str = f"{today.month}月{today.day}日({weekday_map[today.weekday()]})"
+        today_str = f"{today.month}月{today.day}日({WEEKDAY_MAP[today.weekday()]})"
         logging.debug(f"今日の日付: {today_str}")
 
         # 日付ヘッダーをすべて取得してログに出力（デバッグ用）
@@ -103,7 +390,7 @@ def fetch_animax_schedule(driver):
 
         if not day_header:
             # 部分一致で再試行
-            pattern = re.compile(rf"{today.month}月{today.day}日\s*\({weekday_map[today.weekday()]}\)")
+            pattern = re.compile(rf"{today.month}月{today.day}日\s*\({WEEKDAY_MAP[today.weekday()]}\)")
             for header in all_day_headers:
                 header_text = header.text.strip()
                 if pattern.search(header_text):
@@ -116,157 +403,99 @@ def fetch_animax_schedule(driver):
 
         logging.info(f"今日の日付ヘッダー '{today_str}' をクリックします。")
 
-        # スクロールして可視化
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", day_header)
-        time.sleep(1)  # スクロールアニメーションのための待機
+        # スクロールして可視化（アニメーションさせずに即座に移動）
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'instant'});", day_header)
 
-        # JavaScriptを使用してクリック
-        try:
-            driver.execute_script("arguments[0].click();", day_header)
-            logging.debug("JavaScriptを使用してヘッダーをクリックしました。")
-        except Exception as e:
-            logging.warning(f"JavaScriptクリックに失敗しました: {e}")
-            driver.save_screenshot("click_js_error.png")
-            logging.debug("スクリーンショットを 'click_js_error.png' として保存しました。")
-
-        # もしJavaScriptクリックがうまくいかない場合、ActionChainsを使用
-        try:
-            actions = ActionChains(driver)
-            actions.move_to_element(day_header).click().perform()
-            logging.debug("ActionChainsを使用してヘッダーをクリックしました。")
-        except Exception as e:
-            logging.warning(f"ActionChainsクリックに失敗しました: {e}")
-            driver.save_screenshot("click_actionchains_error.png")
-            logging.debug("スクリーンショットを 'click_actionchains_error.png' として保存しました。")
+        # クリックして番組表の内容が変化するのを待つ（変化しなかった場合のみ再クリック）
+        if not click_until_changed(driver, day_header, "#js-program-contents-weekly"):
+            logging.warning("ヘッダークリック後に番組表の変化を確認できませんでした。そのまま取得を続けます。")
 
         # 番組セクションがロードされるまで待機
         WebDriverWait(driver, 20).until(
             EC.presence_of_element_located((By.CLASS_NAME, "m-program-weekly--program"))
         )
 
-        # ページソースを取得
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-
-        # 番組セルを取得（すべて取得）
-        program_cells = soup.select('.m-program-weekly--program')
-        logging.debug(f"取得した番組セルの数: {len(program_cells)}")
-
-        for index, cell in enumerate(program_cells, start=1):
-            try:
-                time_tag = cell.select_one('.m-program-weekly-time')
-                title_tag = cell.select_one('h3')
-                episode_tag = cell.select_one('.m-program-weekly-episode')
-                url_tag = cell.select_one('a')
-
-                program_url = url_tag['href'] if url_tag else ''
-                if program_url and not program_url.startswith('http'):
-                    program_url = "https://www.animax.co.jp" + program_url  # 相対URLを絶対URLに変換
-
-                # サムネURL取得関数を呼び出す
-                thumbnail_url = fetch_thumbnail_url(driver, program_url) if program_url else ''
-
-                # 48件ごとに日付を変更
-                day_offset = (index - 1) // 48  # 0から始まる
-                date_for_program = today + timedelta(days=day_offset)
-                date_str = f"{date_for_program.month}月{date_for_program.day}日({weekday_map[date_for_program.weekday()]})"
+        # ページソースから対象日の番組データだけを取得（サムネもこの分だけ取得する）
+        entries = parse_animax_schedule(driver.page_source, today, days)
 
-                program = {
-                    '日付': date_str,
-                    '時間': time_tag.get_text(strip=True) if time_tag else '',
-                    'タイトル': title_tag.get_text(strip=True) if title_tag else '',
-                    '話数': episode_tag.get_text(strip=True) if episode_tag else '',
-                    # '番組URL': program_url,  # 番組URLは不要なのでコメントアウト
-                    'サムネURL': thumbnail_url,  # サムネURLを追加
-                }
+        # サムネURLをまとめて並列取得
+        with metrics.timed("animax.thumbnail_fetch"):
+            thumbnails = fetch_thumbnail_urls(driver, [program.url for program in entries], cache=cache,
+                                              restart_driver=restart_driver, session=session)
 
-                logging.debug(f"{index}番目の番組取得: {program}")
-                programs.append(program)
-
-            except Exception as e:
-                logging.warning(f"番組データ解析エラー ({index}番目): {e}")
+        for index, program in enumerate(entries, start=1):
+            program.image_url = thumbnails.get(program.url, '')
+            logging.debug(f"{index}番目の番組取得: {program}")
+            programs.append(program)
 
     except Exception as e:
         logging.error(f"スケジュールページの取得中にエラーが発生しました: {e}")
 
     return programs
 
+def build_sheets(programs):
+    """
+    番組データをシートの行に整形し、{シート名: (ヘッダー, 行のリスト)} を返す関数
+    """
+    if not programs:
+        logging.warning("書き込むデータが存在しません。")
+        return {}
+    return {SHEET_NAME: (SHEET_HEADER, sheet_rows(programs, SHEET_COLUMNS))}
+
 def write_to_spreadsheet(programs):
     """
     取得した番組データをGoogleスプレッドシートに書き込む関数
     """
     try:
-        scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        creds = ServiceAccountCredentials.from_json_keyfile_name(SERVICE_ACCOUNT_FILE, scope)
-        gc = gspread.authorize(creds)
+        # 現在のシートと比較し、差分のある範囲だけを書き換え
+        write_sheets(SPREADSHEET_ID, SERVICE_ACCOUNT_FILE, build_sheets(programs))
+    except Exception as e:
+        logging.error(f"スプレッドシートへの書き込み中にエラーが発生しました: {e}")
 
-        sh = gc.open_by_key(SPREADSHEET_ID)
+# 取得元アダプタ
+@register
+class AnimaxSource(Source):
+    """アニマックスの取得元（週間番組表＋番組詳細ページのサムネ）"""
+    name = "animax"
+    label = "アニマックス"
+    sheet_names = (SHEET_NAME,)
+    sheet_header = SHEET_HEADER
+    sheet_columns = SHEET_COLUMNS
 
-        try:
-            worksheet = sh.worksheet(SHEET_NAME)
-            sh.del_worksheet(worksheet)
-            logging.debug(f"既存のシート '{SHEET_NAME}' を削除しました。")
-            time.sleep(2)
-        except Exception as e:
-            logging.debug(f"シート '{SHEET_NAME}' が存在しない可能性があります: {e}")
-
-        sheet = sh.add_worksheet(title=SHEET_NAME, rows="1000", cols="10")
-        logging.debug(f"新しいシート '{SHEET_NAME}' を作成しました。")
-        time.sleep(2)
-
-        # ヘッダーを追加
-        sheet.append_row(["日付", "時間", "タイトル", "話数", "サムネURL"])
-
-        # データを整形
-        data = [[
-            prog['日付'],
-            prog['時間'],
-            prog['タイトル'],
-            prog['話数'],
-            prog['サムネURL']
-        ] for prog in programs]
-
-        if data:
-            # バッチ更新を利用してデータを書き込む
-            sheet.batch_update([
-                {
-                    'range': f"A2:E{len(data)+1}",
-                    'values': data,
-                    'majorDimension': 'ROWS'
-                }
-            ])
-            logging.info(f"✅ '{SHEET_NAME}' に {len(data)} 件書き込み完了")
-        else:
-            logging.warning("書き込むデータが存在しません。")
+    def fetch(self, context):
+        with context.driver_pool.driver() as driver:
+            return fetch_animax_schedule(driver, cache=context.thumbnail_cache,
+                                         restart_driver=context.driver_pool.restart, session=context.session)
 
-    except Exception as e:
-        logging.error(f"スプレッドシートへの書き込み中にエラーが発生しました: {e}")
+    def parse(self, html, date):
+        return parse_animax_schedule(html, date)
+
+    def build_sheets(self, programs):
+        return build_sheets(programs)
 
 # メイン処理
 def main():
     """
     メイン関数：番組表の取得とスプレッドシートへの書き込みを実行
     """
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--window-size=1920,1080')  # 画面サイズを大きく設定
-    options.add_argument('--disable-gpu')  # GPUを無効化
-    options.add_argument('--disable-extensions')  # 拡張機能を無効化
-    options.add_argument('--start-maximized')  # 最大化で起動
-
-    driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=options)
+    driver_pool = DriverPool(1)
+    cache = ThumbnailCache(THUMBNAIL_CACHE_FILE, ttl=THUMBNAIL_CACHE_TTL, negative_ttl=THUMBNAIL_CACHE_NEGATIVE_TTL)
     try:
-        programs = fetch_animax_schedule(driver)
+        with metrics.timed("animax.fetch"), driver_pool.driver() as driver:
+            programs = fetch_animax_schedule(driver, cache=cache, restart_driver=driver_pool.restart)
 
         if programs:
             logging.info(f"取得番組数: {len(programs)}")
-            write_to_spreadsheet(programs)
+            with metrics.timed("sheets.write"):
+                write_to_spreadsheet(programs)
         else:
             logging.error("番組データを取得できませんでした。")
     finally:
-        driver.quit()
+        driver_pool.close()
         logging.debug("WebDriver を終了しました。")
+        cache.close()
+        cache.log_stats()
+        metrics.report()
 
 if __name__ == "__main__":
     main()
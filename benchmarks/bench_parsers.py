@@ -0,0 +1,93 @@
+"""
+パーサーのバックエンド（lxml / bs4）ごとの解析時間とピークメモリを比較するベンチマーク
+
+    python benchmarks/make_fixtures.py   # フィクスチャが無い場合
+    python benchmarks/bench_parsers.py [--repeat 20]
+
+メモリはバックエンドごとに別プロセスで測定する（lxml のCヒープも含めるため最大RSSの増分を使う）
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import parsers  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+CASES = {
+    "wowow_day": ("wowow_day.html", parsers.parse_wowow_cells),
+    "animax_weekly": ("animax_weekly.html", parsers.parse_animax_days),
+    "animax_detail": ("animax_detail.html", parsers.parse_animax_thumbnail),
+}
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+
+def measure(case, backend, repeat):
+    """1ケース・1バックエンドを測定する（別プロセスから呼ばれる）"""
+    fixture, func = CASES[case]
+    html = load_fixture(fixture)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    result = func(html, backend=backend)
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html, backend=backend)
+        timings.append(time.perf_counter() - start)
+
+    if isinstance(result, tuple):  # parse_animax_days は (日付見出し, 日ごとのセル) を返す
+        result = [cell for cells in result[1] for cell in cells]
+    return {
+        "case": case,
+        "backend": backend,
+        "items": len(result) if isinstance(result, list) else int(bool(result)),
+        "best_ms": min(timings) * 1000,
+        "mean_ms": sum(timings) / len(timings) * 1000,
+        "py_peak_kb": py_peak / 1024,
+        "rss_delta_kb": rss_after - rss_before,  # Linux の ru_maxrss はKB単位
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--one", nargs=2, metavar=("CASE", "BACKEND"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one:
+        print(json.dumps(measure(args.one[0], args.one[1], args.repeat)))
+        return
+
+    results = []
+    for case in CASES:
+        for backend in parsers.BACKENDS:
+            output = subprocess.run(
+                [sys.executable, __file__, "--one", case, backend, "--repeat", str(args.repeat)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output))
+
+    print(f"{'case':<15}{'backend':<9}{'items':>6}{'best ms':>10}{'mean ms':>10}{'py peak KB':>12}{'RSS +KB':>10}")
+    for r in results:
+        print(f"{r['case']:<15}{r['backend']:<9}{r['items']:>6}{r['best_ms']:>10.2f}{r['mean_ms']:>10.2f}"
+              f"{r['py_peak_kb']:>12.0f}{r['rss_delta_kb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+ベンチマーク用のローカルなスプレッドシート代替
+
+sheet_sync が使う gspread.Spreadsheet のメソッドだけを実装し、値はメモリ上に保持する。
+FakeClient は gspread.Client の代わりに sheet_sync.write_sheets() へ渡して、API呼び出しの総数を数えるのに使う。
+リクエスト本文は実際のAPIと同じくJSONにシリアライズしてから解釈するので、
+書き込み経路のシリアライズ・差分計算のコストをネットワーク無しで測定できる。
+"""
+import json
+import re
+from collections import Counter
+
+_RANGE_RE = re.compile(r"^'((?:[^']|'')*)'(?:!([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?)?$")
+
+
+def _column_index(letters):
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch) - ord('A') + 1)
+    return index
+
+
+class FakeSpreadsheet:
+    """メモリ上でシートの値を保持する gspread.Spreadsheet の代替"""
+
+    def __init__(self):
+        self.sheets = {}  # シート名 -> {'sheetId', 'rowCount', 'columnCount', 'values'}
+        self.calls = Counter()
+        self.bytes_sent = 0
+
+    def _send(self, method, body):
+        self.calls[method] += 1
+        payload = json.dumps(body, ensure_ascii=False)
+        self.bytes_sent += len(payload.encode("utf-8"))
+        return json.loads(payload)
+
+    def _parse_range(self, range_name):
+        match = _RANGE_RE.match(range_name)
+        if not match:
+            raise ValueError(f"unsupported range: {range_name}")
+        title = match.group(1).replace("''", "'")
+        if match.group(2) is None:
+            return title, None
+        row = int(match.group(3))
+        return title, (row, _column_index(match.group(2)))
+
+    def fetch_sheet_metadata(self, params=None):
+        self._send("fetch_sheet_metadata", params or {})
+        return {'sheets': [
+            {'properties': {
+                'title': title,
+                'sheetId': sheet['sheetId'],
+                'gridProperties': {'rowCount': sheet['rowCount'], 'columnCount': sheet['columnCount']},
+            }} for title, sheet in self.sheets.items()
+        ]}
+
+    def values_batch_get(self, ranges, params=None):
+        ranges = self._send("values_batch_get", ranges)
+        value_ranges = []
+        for range_name in ranges:
+            title, _ = self._parse_range(range_name)
+            values = self.sheets[title]['values']
+            # 実際のAPIと同じく末尾の空行・空セルは返さない
+            rows = [list(row) for row in values]
+            for row in rows:
+                while row and row[-1] == "":
+                    row.pop()
+            while rows and not rows[-1]:
+                rows.pop()
+            value_ranges.append({'range': range_name, 'values': rows} if rows else {'range': range_name})
+        return {'valueRanges': value_ranges}
+
+    def batch_update(self, body):
+        body = self._send("batch_update", body)
+        for request in body['requests']:
+            if 'addSheet' in request:
+                props = request['addSheet']['properties']
+                grid = props.get('gridProperties', {})
+                self.sheets[props['title']] = {
+                    'sheetId': len(self.sheets) + 1,
+                    'rowCount': grid.get('rowCount', 1000),
+                    'columnCount': grid.get('columnCount', 26),
+                    'values': [],
+                }
+            elif 'updateSheetProperties' in request:
+                props = request['updateSheetProperties']['properties']
+                self._sheet_by_id(props['sheetId'])['rowCount'] = props['gridProperties']['rowCount']
+            elif 'deleteDimension' in request:
+                dimension_range = request['deleteDimension']['range']
+                sheet = self._sheet_by_id(dimension_range['sheetId'])
+                start, end = dimension_range['startIndex'], dimension_range['endIndex']
+                del sheet['values'][start:end]
+                sheet['rowCount'] -= end - start
+            elif 'insertDimension' in request:
+                dimension_range = request['insertDimension']['range']
+                sheet = self._sheet_by_id(dimension_range['sheetId'])
+                start, end = dimension_range['startIndex'], dimension_range['endIndex']
+                if start < len(sheet['values']):
+                    sheet['values'][start:start] = [[] for _ in range(end - start)]
+                sheet['rowCount'] += end - start
+        return {}
+
+    def _sheet_by_id(self, sheet_id):
+        return next(sheet for sheet in self.sheets.values() if sheet['sheetId'] == sheet_id)
+
+    def values_batch_update(self, body=None):
+        body = self._send("values_batch_update", body or {})
+        for data in body['data']:
+            title, start = self._parse_range(data['range'])
+            values = self.sheets[title]['values']
+            start_row, start_col = start
+            for offset, row in enumerate(data['values']):
+                index = start_row - 1 + offset
+                while len(values) <= index:
+                    values.append([])
+                current = values[index]
+                width = start_col - 1 + len(row)
+                current.extend([""] * (width - len(current)))
+                current[start_col - 1:width] = row
+        return {}
+
+
+class FakeClient:
+    """
+    gspread.Client の代替（sheet_sync が使う http_client 経由の呼び出しと open_by_key だけを実装する）
+    呼び出しはスプレッドシートごとの FakeSpreadsheet.calls に数える
+    """
+
+    def __init__(self):
+        self.spreadsheets = {}  # スプレッドシートID -> FakeSpreadsheet
+        self.http_client = self
+
+    def spreadsheet(self, spreadsheet_id):
+        return self.spreadsheets.setdefault(spreadsheet_id, FakeSpreadsheet())
+
+    def open_by_key(self, key):
+        # gspread 6 の Spreadsheet は生成時にメタデータを取得する
+        sh = self.spreadsheet(key)
+        sh.fetch_sheet_metadata()
+        return sh
+
+    def fetch_sheet_metadata(self, id, params=None):
+        return self.spreadsheet(id).fetch_sheet_metadata(params)
+
+    def values_batch_get(self, id, ranges, params=None):
+        return self.spreadsheet(id).values_batch_get(ranges, params)
+
+    def batch_update(self, id, body):
+        return self.spreadsheet(id).batch_update(body)
+
+    def values_batch_update(self, id, body=None):
+        return self.spreadsheet(id).values_batch_update(body)
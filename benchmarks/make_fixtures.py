@@ -0,0 +1,107 @@
+"""
+ベンチマーク用のHTMLフィクスチャを生成するスクリプト
+
+実サイトと同じセレクタ構造を持つ番組表ページを生成して benchmarks/fixtures/ に保存する。
+実サイトのスナップショットを保存した場合は、同じファイル名で置き換えればそのまま使える。
+（抽出結果の確認は tests/ のテストがページの種類ごとのスナップショット tests/fixtures/ で行う）
+
+    python benchmarks/make_fixtures.py
+"""
+import os
+import random
+from datetime import datetime, timedelta
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+WEEKDAYS = "月火水木金土日"
+START_DATE = datetime(2025, 4, 14)
+
+TITLES = ["名探偵の事件簿", "宇宙戦艦の航跡", "魔法少女の放課後", "異世界ぐらしの記録", "ロボット大戦",
+          "海辺のカフェ物語", "剣と魔法の王国", "テニスの天才", "忍者学園", "深夜の映画劇場"]
+
+
+def wowow_day_page(rng, programs_per_channel=28):
+    """WOWOWの1日分の番組表ページ"""
+    rows = []
+    for i in range(programs_per_channel):
+        cells = []
+        for cls in ("__prime", "__live", "__cinema"):
+            hour, minute = divmod(5 * 60 + i * 50, 60)
+            title = f"{rng.choice(TITLES)} 第{rng.randint(1, 24)}話"
+            cells.append(
+                f'<td class="{cls} __genre-{rng.randint(1, 9)}">'
+                f'<div class="__inner"><p class="__time">{hour % 24:02d}:{minute:02d}</p>'
+                f'<div class="__thumb"><img src=" https://www.wowow.co.jp/img/{cls[2:]}/{i:04d}.jpg " alt=""></div>'
+                f'<p class="__title"><a href="/detail/{rng.randint(100000, 999999)}">'
+                f'<span class="__title-text">{title}</span></a></p>'
+                f'<div class="__lead"><p>{title}のあらすじ。' + "物語は思わぬ方向へ進んでいく。" * rng.randint(1, 4) + '</p></div>'
+                f'<ul class="__icons"><li>字幕</li><li>HD</li></ul></div></td>'
+            )
+        rows.append("<tr>" + "".join(cells) + "</tr>")
+    next_day = (START_DATE + timedelta(days=1)).strftime("%Y%m%d")
+    return (
+        '<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8"><title>番組表 | WOWOW</title></head><body>'
+        '<header class="mdl__header"><nav>' + '<a href="#">メニュー</a>' * 30 + '</nav></header>'
+        '<main><table class="mdl__program-table"><thead><tr><th>プライム</th><th>ライブ</th><th>シネマ</th></tr></thead>'
+        '<tbody>' + "".join(rows) + '</tbody></table>'
+        f'<a class="btn__more-view" href="/schedule/{next_day}">翌日の番組表</a></main>'
+        '<footer>' + '<p>フッター</p>' * 20 + '</footer></body></html>'
+    )
+
+
+def animax_weekly_page(rng, days=7, slots_per_day=48):
+    """アニマックスの週間番組表ページ（日ごとの列の中に番組セルが並ぶ構造）"""
+    headers = []
+    columns = []
+    for day in range(days):
+        date = START_DATE + timedelta(days=day)
+        headers.append(f'<li><a href="#day{day}">{date.month}月{date.day}日({WEEKDAYS[date.weekday()]})</a></li>')
+        cells = []
+        for slot in range(slots_per_day):
+            hour, minute = divmod(slot * 30, 60)
+            cells.append(
+                '<div class="m-program-weekly--program">'
+                f'<a href="/programs/detail/{rng.randint(1000, 1400)}">'
+                f'<p class="m-program-weekly-time"> {hour:02d}:{minute:02d} </p>'
+                f'<h3> {rng.choice(TITLES)} </h3>'
+                f'<p class="m-program-weekly-episode"> #{rng.randint(1, 24)} </p>'
+                '</a></div>'
+            )
+        columns.append(f'<div class="m-program-weekly--day" id="day{day}">' + "".join(cells) + '</div>')
+    return (
+        '<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8"><title>週間番組表 | アニマックス</title></head><body>'
+        '<ul id="js-program-header">' + "".join(headers) + '</ul>'
+        '<div id="js-program-contents-weekly" class="m-program-weekly">' + "".join(columns) + '</div>'
+        '</body></html>'
+    )
+
+
+def animax_detail_page(rng):
+    """アニマックスの番組詳細ページ"""
+    return (
+        '<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8"><title>番組詳細 | アニマックス</title></head><body>'
+        '<div class="p-detail">'
+        '<div class="p-detail-block block-title pc-order-2"><h1>' + rng.choice(TITLES) + '</h1></div>'
+        '<div class="p-detail-block block-thumbnail pc-order-1"><figure class="p-detail-img">'
+        f'<img src="https://www.animax.co.jp/uploads/programs/{rng.randint(1000, 1400)}/main.jpg" alt=""></figure></div>'
+        '<div class="p-detail-block block-story pc-order-3">' + '<p>あらすじ。</p>' * 40 + '</div>'
+        '</div></body></html>'
+    )
+
+
+def main():
+    rng = random.Random(0)
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    pages = {
+        "wowow_day.html": wowow_day_page(rng),
+        "animax_weekly.html": animax_weekly_page(rng),
+        "animax_detail.html": animax_detail_page(rng),
+    }
+    for name, html in pages.items():
+        path = os.path.join(FIXTURES_DIR, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"{path}: {len(html.encode('utf-8')):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
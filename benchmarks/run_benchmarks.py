@@ -0,0 +1,174 @@
+"""
+保存済みHTMLフィクスチャを使って、両スクレイパーの処理段階ごとの時間を測定するベンチマーク
+
+段階: parse（HTML解析）/ extract（セルの取り出し）/ rows（番組データ・シート行の組み立て）
+      / serialize（APIリクエスト本文のJSON化）/ write（ローカルの偽スプレッドシートへの差分同期）
+
+    python benchmarks/run_benchmarks.py [--repeat 20] [--backend lxml] [--no-history]
+
+結果は benchmarks/history.jsonl に追記され、前回の同じバックエンドの結果との差分が表示される
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import animax  # noqa: E402
+import parsers  # noqa: E402
+import wowow_schedule  # noqa: E402
+from fake_sheets import FakeSpreadsheet  # noqa: E402
+from sheet_sync import sync_spreadsheet  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+HISTORY_FILE = os.path.join(ROOT, "benchmarks", "history.jsonl")
+FIXTURE_DATE = datetime(2025, 4, 14)
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+
+def best_of(func, repeat):
+    """func を repeat 回実行し、最短時間(ms)と最後の戻り値を返す"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def bench_write(sheets, repeat):
+    """偽スプレッドシートへの初回書き込み・変更なし再同期の時間とAPI呼び出し数を測る"""
+    def initial():
+        sh = FakeSpreadsheet()
+        sync_spreadsheet(sh, sheets)
+        return sh
+    write_ms, sh = best_of(initial, repeat)
+    calls_initial = sum(sh.calls.values())
+    bytes_initial = sh.bytes_sent
+
+    sh.calls.clear()
+    resync_ms, _ = best_of(lambda: sync_spreadsheet(sh, sheets), repeat)
+    return {
+        "write": write_ms,
+        "resync": resync_ms,
+        "api_calls": calls_initial,
+        "bytes_sent": bytes_initial,
+    }
+
+
+def bench_wowow(backend, repeat):
+    html = load_fixture("wowow_day.html")
+    results = {}
+    results["parse"], doc = best_of(lambda: parsers.parse_document(html, backend), repeat)
+    results["extract"], cells = best_of(lambda: parsers.extract_wowow_cells(doc, backend), repeat)
+    results["rows"], sheets = best_of(
+        lambda: wowow_schedule.build_sheets(
+            wowow_schedule.build_programs(cells, FIXTURE_DATE.strftime("%Y/%m/%d"))),
+        repeat,
+    )
+    results["serialize"], _ = best_of(lambda: json.dumps(sheets, ensure_ascii=False), repeat)
+    results.update(bench_write(sheets, repeat))
+    results["items"] = len(cells)
+    return results
+
+
+def bench_animax(backend, repeat):
+    html = load_fixture("animax_weekly.html")
+    detail_html = load_fixture("animax_detail.html")
+    results = {}
+    results["parse"], doc = best_of(lambda: parsers.parse_document(html, backend), repeat)
+    results["extract"], (labels, day_cells) = best_of(lambda: parsers.extract_animax_days(doc, backend), repeat)
+    results["detail_parse"], detail_doc = best_of(lambda: parsers.parse_document(detail_html, backend), repeat)
+    results["detail_extract"], thumbnail = best_of(
+        lambda: parsers.extract_animax_thumbnail(detail_doc, backend), repeat)
+
+    def build_rows():
+        dated_cells = animax.select_days(animax.assign_dates(labels, day_cells, FIXTURE_DATE), FIXTURE_DATE, 7)
+        programs = animax.build_programs(dated_cells)
+        for program in programs:
+            program.image_url = thumbnail
+        return animax.build_sheets(programs)
+    results["rows"], sheets = best_of(build_rows, repeat)
+    results["serialize"], _ = best_of(lambda: json.dumps(sheets, ensure_ascii=False), repeat)
+    results.update(bench_write(sheets, repeat))
+    results["items"] = sum(len(cells) for cells in day_cells)
+    return results
+
+
+SCENARIOS = {
+    "wowow_day": bench_wowow,
+    "animax_weekly": bench_animax,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return ""
+
+
+def load_previous(backend):
+    """履歴から同じバックエンドの直近の結果を返す"""
+    if not os.path.exists(HISTORY_FILE):
+        return None
+    previous = None
+    with open(HISTORY_FILE, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry.get("backend") == backend:
+                previous = entry
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--backend", choices=parsers.BACKENDS, default=parsers.resolve_backend())
+    parser.add_argument("--no-history", action="store_true", help="結果を履歴に保存しない")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)  # 番組ごとのDEBUGログを測定に含めない
+
+    results = {name: func(args.backend, args.repeat) for name, func in SCENARIOS.items()}
+    previous = load_previous(args.backend)
+
+    print(f"backend={args.backend} repeat={args.repeat}")
+    for name, stages in results.items():
+        print(f"\n[{name}] items={stages['items']} api_calls={stages['api_calls']} bytes_sent={stages['bytes_sent']:,}")
+        for stage, value in stages.items():
+            if stage in ("items", "api_calls", "bytes_sent"):
+                continue
+            line = f"  {stage:<15}{value:>10.3f} ms"
+            old = (previous or {}).get("results", {}).get(name, {}).get(stage)
+            if old:
+                line += f"  ({(value - old) / old * 100:+.1f}% vs {previous['commit'] or previous['timestamp']})"
+            print(line)
+
+    if not args.no_history:
+        entry = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "backend": args.backend,
+            "repeat": args.repeat,
+            "results": results,
+        }
+        with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+import atexit
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+try:
+    import fcntl
+except ImportError:  # Windows ではプロファイルのロックを取らず、毎回一時プロファイルを使う
+    fcntl = None
+
+import metrics
+from http_client import USER_AGENT
+from resource_blocking import PAGE_REPORT, enable_resource_blocking
+
+# ========== 設定 ==========
+CHROME_BINARY = os.environ.get("CHROME_BINARY")  # Chromeのパスを固定する場合に指定
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH")  # ChromeDriverのパスを固定する場合に指定
+CHROMEDRIVER_CACHE_DIR = os.environ.get("CHROMEDRIVER_CACHE_DIR", ".chromedriver")  # Chromeのメジャー版ごとに保存
+CHROME_PROFILE_DIR = os.environ.get("CHROME_PROFILE_DIR", ".chrome-profile")  # 使い回すユーザーデータの保存先（空で無効）
+# 画像の描画・Webフォントを無効にする軽量モード（"0" で無効）
+# 取得自体を止めるリソースの種類は resource_blocking.BLOCK_RESOURCES で設定する
+BROWSER_LITE = os.environ.get("BROWSER_LITE", "1") != "0"
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+_profile_locks = {}  # プロファイル番号 -> ロックファイル（プロセスの終了まで開いたままにして占有する）
+_profile_locks_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def find_chrome_binary():
+    """Google Chromeのバイナリパスを自動検出する"""
+    candidates = [CHROME_BINARY] if CHROME_BINARY else []
+    candidates += ["/usr/bin/google-chrome-stable", "/usr/bin/google-chrome"]
+    for path in candidates:
+        if os.path.exists(path):
+            logging.info(f"Chrome binary found: {path}")
+            return path
+    raise FileNotFoundError("Google Chrome binary not found.")
+
+
+def _binary_version(path):
+    """`<path> --version` の出力からバージョン番号（例: 135.0.7049.84）を取り出す"""
+    try:
+        output = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logging.debug(f"バージョンを取得できませんでした ({path}): {e}")
+        return None
+    match = re.search(r"\d+\.\d+\.\d+\.\d+", output)
+    return match.group(0) if match else None
+
+
+def resolve_chromedriver(chrome_binary):
+    """
+    Chromeに合うChromeDriverのパスと取得元を返す
+    固定パス → ローカルキャッシュ → PATH上のchromedriver → webdriver-manager の順に探し、
+    ダウンロードした場合はChromeのメジャー版ごとにキャッシュへ保存する
+    """
+    if CHROMEDRIVER_PATH:
+        if os.access(CHROMEDRIVER_PATH, os.X_OK):
+            return CHROMEDRIVER_PATH, "pinned"
+        logging.warning(f"CHROMEDRIVER_PATH が実行できません: {CHROMEDRIVER_PATH}")
+
+    chrome_version = _binary_version(chrome_binary)
+    major = chrome_version.split(".")[0] if chrome_version else None
+    cached_path = os.path.join(CHROMEDRIVER_CACHE_DIR, major, "chromedriver") if major else None
+
+    if cached_path and os.access(cached_path, os.X_OK):
+        return cached_path, "cache"
+
+    system_path = shutil.which("chromedriver")
+    if major and system_path and (_binary_version(system_path) or "").split(".")[0] == major:
+        return system_path, "path"
+
+    path = ChromeDriverManager().install()
+    if cached_path:
+        try:
+            os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+            shutil.copy2(path, cached_path)
+            path = cached_path
+        except OSError as e:
+            logging.warning(f"ChromeDriverをキャッシュに保存できませんでした: {e}")
+    return path, "download"
+
+
+def chromedriver_path():
+    """ChromeDriverのパスを返す（解決はプロセス内で一度だけ）"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            with metrics.timed("driver.resolve"):
+                _driver_path, source = resolve_chromedriver(find_chrome_binary())
+            metrics.incr(f"driver.resolved_from_{source}")
+            logging.info(f"ChromeDriver: {_driver_path} ({source})")
+        return _driver_path
+
+
+def _lock_profile_slot(slot):
+    """
+    slot 番目のプロファイルをこのプロセスで占有する（取得済みなら何もしない）
+    他のプロセス（同時に動いている別の実行）が使用中なら False を返す
+    """
+    with _profile_locks_lock:
+        if slot in _profile_locks:
+            return True
+        if fcntl is None:
+            return False
+        os.makedirs(CHROME_PROFILE_DIR, exist_ok=True)
+        lock_file = open(os.path.join(CHROME_PROFILE_DIR, f"slot-{slot}.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        _profile_locks[slot] = lock_file
+        return True
+
+
+def _temporary_profile_dir():
+    """プロセスの終了時に削除する一時的なユーザーデータディレクトリを作る"""
+    path = tempfile.mkdtemp(prefix="chrome-profile-")
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def _prepare_profile_dir(slot):
+    """
+    slot 番目のWebDriver用のユーザーデータディレクトリを用意する
+    別のプロセスが同じプロファイルを使用中の場合は、一時的なプロファイルを返す
+    """
+    if not _lock_profile_slot(slot):
+        metrics.incr("driver.profile_busy")
+        logging.warning(f"プロファイル slot-{slot} は別のプロセスが使用中のため、一時プロファイルで起動します。")
+        return _temporary_profile_dir()
+
+    path = os.path.abspath(os.path.join(CHROME_PROFILE_DIR, f"slot-{slot}"))
+    os.makedirs(path, exist_ok=True)
+    # 異常終了したChromeのロックが残っていると起動できないため削除する
+    # （スロットのロックを取れたので、このプロファイルを使っているChromeは他に無い）
+    for name in ("SingletonLock", "SingletonSocket", "SingletonCookie"):
+        lock_path = os.path.join(path, name)
+        if os.path.lexists(lock_path):
+            os.remove(lock_path)
+    return path
+
+
+def create_driver(profile_slot=0, lite=None, block_resources=None):
+    """
+    ヘッドレスChromeのWebDriverを起動する
+    profile_slot: 使い回すユーザーデータディレクトリの番号（同時に起動するWebDriverごとに別の番号にする）
+    lite: 画像の描画・Webフォントを無効にする（省略時は BROWSER_LITE）
+    block_resources: 取得を止めるリソースの種類（"images,trackers" など。省略時は BLOCK_RESOURCES）
+    """
+    lite = BROWSER_LITE if lite is None else lite
+    started_at = time.perf_counter()
+
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--window-size=1920,1080')  # 画面サイズを大きく設定
+    options.add_argument('--disable-gpu')  # GPUを無効化
+    options.add_argument('--disable-extensions')  # 拡張機能を無効化
+    options.add_argument('--lang=ja-JP')
+    options.add_argument(f'user-agent={USER_AGENT}')
+    options.add_argument('--no-first-run')
+    options.add_argument('--no-default-browser-check')
+    if CHROME_PROFILE_DIR:
+        options.add_argument(f'--user-data-dir={_prepare_profile_dir(profile_slot)}')
+    if lite:
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_argument('--disable-remote-fonts')
+        options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    if PAGE_REPORT:
+        # ページごとの転送量を集計するためにネットワークイベントをログに残す
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    options.binary_location = find_chrome_binary()
+
+    service = Service(chromedriver_path())
+    with metrics.timed("driver.startup"):
+        driver = webdriver.Chrome(service=service, options=options)
+    metrics.incr("driver.started")
+    # ブラウザのタイムゾーンをJSTに設定
+    driver.execute_cdp_cmd('Emulation.setTimezoneOverride', {"timezoneId": "Asia/Tokyo"})
+    blocked = enable_resource_blocking(driver, block_resources)
+
+    elapsed = time.perf_counter() - started_at
+    logging.info(f"Chrome起動完了: {elapsed:.2f}秒 (プロファイル: slot-{profile_slot}, 軽量モード: {'有効' if lite else '無効'}, "
+                 f"ブロック: {len(blocked)} パターン)")
+    return driver
+
+
+class DriverPool:
+    """
+    WebDriverを最大 size 個まで遅延起動して使い回すプール
+    複数のスクレイパーやスレッドから同じChromeを共有するために使う
+    """
+
+    def __init__(self, size=1):
+        self.size = max(1, size)
+        self._idle = []  # 返却済みで空いているWebDriver
+        self._drivers = []  # 起動済みのWebDriver（起動中の枠は None）
+        self._slots = set()  # 使用中のプロファイル番号
+        self._slot_of = {}  # id(WebDriver) -> プロファイル番号
+        self._replaced = {}  # id(再起動前のWebDriver) -> 再起動後のWebDriver（起動失敗時は None）
+        self._lock = threading.Lock()
+        # WebDriverの返却・起動失敗で空きができたことを待機中のスレッドに知らせる
+        self._available = threading.Condition(self._lock)
+
+    @contextmanager
+    def driver(self):
+        """空いているWebDriverを借りる（無ければ起動するか、返却されるまで待つ）"""
+        driver = self._checkout()
+        try:
+            yield driver
+        finally:
+            # 貸出中に restart() された場合は再起動後のWebDriverを返却する
+            with self._available:
+                driver = self._replaced.pop(id(driver), driver)
+                if driver is not None:
+                    self._idle.append(driver)
+                    self._available.notify()
+
+    def _checkout(self):
+        """
+        空いているWebDriverを返す。無ければ枠に空きがある限り起動し、枠が埋まっていれば返却か枠の解放を待つ
+        （他のスレッドの起動・再起動が失敗して枠が空いた場合は、待っていたスレッドが自分で起動する）
+        """
+        with self._available:
+            while not self._idle and len(self._drivers) >= self.size:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            slot = min(set(range(self.size)) - self._slots)
+            self._slots.add(slot)
+            self._drivers.append(None)  # 起動中の枠を確保
+
+        try:
+            driver = create_driver(profile_slot=slot)
+        except Exception:
+            with self._available:
+                self._drivers.remove(None)
+                self._slots.discard(slot)
+                self._available.notify()
+            raise
+        with self._lock:
+            self._drivers[self._drivers.index(None)] = driver
+            self._slot_of[id(driver)] = slot
+        logging.debug(f"WebDriverを起動しました ({len(self._drivers)}/{self.size})")
+        return driver
+
+    def restart(self, driver):
+        """
+        応答しなくなった（クラッシュした）WebDriverを終了し、同じプロファイル番号で起動し直したものを返す
+        貸出中の driver に対して呼び出し、以降は戻り値のWebDriverを使う
+        """
+        with self._lock:
+            slot = self._slot_of.pop(id(driver))
+            self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.debug(f"クラッシュしたWebDriverの終了中にエラー: {e}")
+        metrics.incr("driver.restarts")
+        logging.warning(f"WebDriverを再起動します (slot-{slot})")
+
+        try:
+            new_driver = create_driver(profile_slot=slot)
+        except Exception:
+            with self._available:
+                self._slots.discard(slot)
+                self._record_replacement(driver, None)
+                self._available.notify()
+            raise
+        with self._lock:
+            self._drivers.append(new_driver)
+            self._slot_of[id(new_driver)] = slot
+            self._record_replacement(driver, new_driver)
+        return new_driver
+
+    def _record_replacement(self, old, new):
+        # 貸出中に再起動を繰り返した場合も、貸し出したWebDriverから最新のものを引けるようにする
+        for key, value in self._replaced.items():
+            if value is old:
+                self._replaced[key] = new
+                return
+        self._replaced[id(old)] = new
+
+    def close(self):
+        """起動したすべてのWebDriverを終了する"""
+        with self._lock:
+            drivers, self._drivers = [d for d in self._drivers if d is not None], []
+            self._idle.clear()
+            self._slots.clear()
+            self._slot_of.clear()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                logging.warning(f"WebDriverの終了中にエラー: {e}")
+        if drivers:
+            logging.debug(f"WebDriver を {len(drivers)} 個終了しました。")
+
+
+def warm_up():
+    """ChromeDriverを解決してキャッシュし、プロファイルを初期化しておく（デプロイ・CIの準備用）"""
+    started_at = time.perf_counter()
+    driver = create_driver()
+    try:
+        driver.get("about:blank")
+    finally:
+        driver.quit()
+    logging.info(f"ウォームアップ完了: {time.perf_counter() - started_at:.2f}秒")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    if "--warm" in sys.argv[1:]:
+        warm_up()
+    else:
+        print("usage: python browser.py --warm")
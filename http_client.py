@@ -0,0 +1,149 @@
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from parsers import declared_encoding
+
+# ========== 設定 ==========
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+              'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.7049.84 Safari/537.36')
+DEFAULT_TIMEOUT = 20  # 秒
+HTTP_BUDGET = int(os.environ.get("HTTP_BUDGET", "8"))  # プロセス全体での同時HTTPリクエスト数の上限
+
+# 接続エラー・タイムアウト・429/5xx 時のリトライ設定
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0  # 秒
+BACKOFF_MAX = 16.0  # 秒
+
+
+_http_budget = threading.BoundedSemaphore(max(1, HTTP_BUDGET))
+
+
+class HostRateLimiter:
+    """
+    ホストごとにリクエスト間隔を制限する簡易レートリミッタ
+    （per_second 回/秒を上限とし、0以下なら無制限）
+    """
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        """url のホストに対して次のリクエスト枠が来るまで待機する"""
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def create_session(pool_size=10):
+    """コネクションプールを持つ requests.Session を生成する"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept-Language": "ja-JP,ja;q=0.9",
+    })
+    return session
+
+
+def fetch_html(session, url, limiter=None, timeout=DEFAULT_TIMEOUT):
+    """
+    url のHTMLを文字列で取得する
+    文字コードは HTTPヘッダーの charset → HTML内の meta charset → 内容からの推定 の順に決める
+    """
+    if limiter:
+        with metrics.timed("http.rate_limit_wait"):
+            limiter.wait(url)
+    # 取得元・スレッドの数に関わらず、同時に送るリクエストは HTTP_BUDGET 本までにする
+    with metrics.timed("http.budget_wait"):
+        _http_budget.acquire()
+    try:
+        with metrics.timed("http.get"):
+            response = session.get(url, timeout=timeout)
+    finally:
+        _http_budget.release()
+    metrics.incr("http.requests")
+    metrics.incr("http.bytes", len(response.content))
+    response.raise_for_status()
+    return decode_html(response)
+
+
+def decode_html(response):
+    """レスポンスの本文を文字コードを判定して文字列に変換する"""
+    content_type = response.headers.get("Content-Type", "").lower()
+    # charset の無い text/html に requests が仮に設定する ISO-8859-1 は使わない
+    encoding = response.encoding if "charset=" in content_type else None
+    encoding = encoding or declared_encoding(response.content) or response.apparent_encoding or "utf-8"
+    try:
+        return response.content.decode(encoding, errors="replace")
+    except LookupError:
+        return response.content.decode("utf-8", errors="replace")
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, maximum=BACKOFF_MAX):
+    """attempt 回目（0始まり）の再試行までの待ち時間（指数バックオフ＋ゆらぎ）を返す"""
+    return min(maximum, base * (2 ** attempt)) + random.uniform(0, base)
+
+
+def is_retryable(error):
+    """一時的なエラー（接続エラー・タイムアウト・429/5xx）かどうか"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None) in RETRY_STATUS_CODES
+
+
+def fetch_html_with_retries(session, url, limiter=None, retries=MAX_RETRIES, timeout=DEFAULT_TIMEOUT):
+    """
+    fetch_html() を実行し、一時的なエラーの場合は最大 retries 回まで指数バックオフで再試行する
+    """
+    for attempt in range(retries + 1):
+        try:
+            return fetch_html(session, url, limiter=limiter, timeout=timeout)
+        except requests.RequestException as e:
+            if not is_retryable(e) or attempt == retries:
+                raise
+            metrics.incr("http.retries")
+            delay = backoff_delay(attempt)
+            logging.warning(f"取得に失敗しました ({url}): {e}。{delay:.1f}秒後に再試行します ({attempt + 1}/{retries})")
+            time.sleep(delay)
+
+
+def map_concurrently(func, items, max_workers):
+    """
+    items の各要素に func を最大 max_workers 並列で適用し、{要素: 結果} を返す
+    例外が発生した要素の結果は None とする
+    """
+    results = {}
+    if not items:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(func, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                results[item] = future.result()
+            except Exception as e:
+                logging.warning(f"並列取得中にエラー ({item}): {e}")
+                results[item] = None
+    return results
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# ========== 設定 ==========
+METRICS_JSON_FILE = os.environ.get("METRICS_JSON_FILE")  # JSONサマリーの出力先（任意）
+METRICS_PROMETHEUS_FILE = os.environ.get("METRICS_PROMETHEUS_FILE")  # Prometheus textfile の出力先（任意）
+PROMETHEUS_PREFIX = "schedule_bot"
+
+_lock = threading.Lock()
+_stages = {}
+_counters = Counter()
+
+
+def record(stage, seconds):
+    """段階 stage の所要時間を記録する"""
+    with _lock:
+        entry = _stages.setdefault(stage, {'count': 0, 'total_s': 0.0, 'max_s': 0.0})
+        entry['count'] += 1
+        entry['total_s'] += seconds
+        entry['max_s'] = max(entry['max_s'], seconds)
+
+
+@contextmanager
+def timed(stage):
+    """with ブロックの所要時間を段階 stage として記録する"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def incr(name, value=1):
+    """カウンター name を加算する"""
+    with _lock:
+        _counters[name] += value
+
+
+def summary():
+    """記録した段階ごとの時間とカウンターを辞書で返す"""
+    with _lock:
+        return {
+            'stages': {
+                stage: {
+                    'count': entry['count'],
+                    'total_s': round(entry['total_s'], 4),
+                    'max_s': round(entry['max_s'], 4),
+                } for stage, entry in sorted(_stages.items())
+            },
+            'counters': dict(sorted(_counters.items())),
+        }
+
+
+def reset():
+    """記録をすべて消去する"""
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+
+
+def _prometheus_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def write_prometheus(path, data=None):
+    """サマリーを Prometheus の textfile 形式で書き出す（node_exporter の textfile collector 用）"""
+    data = data or summary()
+    lines = []
+    # 同じメトリクスの行はまとめて出力する必要がある
+    for metric, key, metric_type in (("stage_seconds_total", 'total_s', "counter"),
+                                     ("stage_count", 'count', "counter"),
+                                     ("stage_seconds_max", 'max_s', "gauge")):
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{metric} {metric_type}")
+        for stage, entry in data['stages'].items():
+            lines.append(f'{PROMETHEUS_PREFIX}_{metric}{{stage="{_prometheus_label(stage)}"}} {entry[key]}')
+    lines.append(f"# TYPE {PROMETHEUS_PREFIX}_events_total counter")
+    for name, value in data['counters'].items():
+        lines.append(f'{PROMETHEUS_PREFIX}_events_total{{name="{_prometheus_label(name)}"}} {value}')
+    lines.append(f"# TYPE {PROMETHEUS_PREFIX}_last_run_timestamp_seconds gauge")
+    lines.append(f"{PROMETHEUS_PREFIX}_last_run_timestamp_seconds {time.time():.0f}")
+
+    # 読み取り途中のファイルを見せないよう、一時ファイルに書いてから置き換える
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def report():
+    """サマリーをJSONでログに出力し、設定があればファイルにも書き出す"""
+    data = summary()
+    payload = json.dumps(data, ensure_ascii=False)
+    logging.info(f"📊 メトリクス: {payload}")
+    try:
+        if METRICS_JSON_FILE:
+            with open(METRICS_JSON_FILE, "w", encoding="utf-8") as f:
+                f.write(payload + "\n")
+        if METRICS_PROMETHEUS_FILE:
+            write_prometheus(METRICS_PROMETHEUS_FILE, data)
+    except OSError as e:
+        logging.warning(f"メトリクスの書き出しに失敗しました: {e}")
+    return data
@@ -0,0 +1,278 @@
+import os
+
+from bs4 import BeautifulSoup
+from bs4.dammit import EncodingDetector
+
+try:
+    import lxml.html
+    HAS_LXML = True
+except ImportError:  # lxml が無い環境では BeautifulSoup にフォールバック
+    HAS_LXML = False
+
+# ========== 設定 ==========
+# パーサーのバックエンド: "lxml"（高速）または "bs4"（従来の BeautifulSoup + html.parser）
+PARSER_BACKEND = os.environ.get("PARSER_BACKEND", "lxml" if HAS_LXML else "bs4")
+BACKENDS = ("lxml", "bs4") if HAS_LXML else ("bs4",)
+
+WOWOW_CHANNEL_CLASSES = ("__prime", "__live", "__cinema")
+ANIMAX_CONTENTS_ID = "js-program-contents-weekly"
+ANIMAX_HEADER_SELECTOR = "#js-program-header a"
+ANIMAX_THUMBNAIL_SELECTOR = 'div.p-detail-block.block-thumbnail.pc-order-1 figure.p-detail-img img'
+
+
+def resolve_backend(backend=None):
+    """使用するバックエンド名を返す（lxml が無ければ bs4）"""
+    backend = backend or PARSER_BACKEND
+    if backend == "lxml" and not HAS_LXML:
+        return "bs4"
+    return backend
+
+
+def declared_encoding(content):
+    """HTMLのバイト列の <meta charset> などで宣言された文字コードを返す（文書のどこにあってもよい・無ければ None）"""
+    return EncodingDetector.find_declared_encoding(content, is_html=True, search_entire_document=True)
+
+
+def parse_document(html, backend=None):
+    """HTML（文字列またはバイト列）を解析してドキュメントを返す（lxml の要素ツリーまたは BeautifulSoup）"""
+    if resolve_backend(backend) == "lxml":
+        if isinstance(html, bytes):
+            # lxml は文書の先頭付近の meta charset しか見ないため、宣言を探して明示的に指定する
+            parser = lxml.html.HTMLParser(encoding=declared_encoding(html) or "utf-8")
+            return lxml.html.document_fromstring(html, parser=parser)
+        return lxml.html.document_fromstring(html)
+    return BeautifulSoup(html, "html.parser")
+
+
+# ========== lxml 用ヘルパー ==========
+def _classes(el):
+    return el.get("class", "").split()
+
+
+def _xpath_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _has_ancestor_class(el, name, stop):
+    """el から stop（セル）までの祖先に name クラスを持つ要素があるか"""
+    el = el.getparent()
+    while el is not None and el is not stop:
+        if name in _classes(el):
+            return True
+        el = el.getparent()
+    return False
+
+
+def _text(el):
+    """BeautifulSoup の .text.strip() 相当"""
+    return el.text_content().strip()
+
+
+def _text_stripped(el):
+    """BeautifulSoup の get_text(strip=True) 相当"""
+    return "".join(s.strip() for s in el.itertext())
+
+
+# ========== WOWOW ==========
+def parse_wowow_cells(html, backend=None):
+    """
+    WOWOWの番組表ページから番組セルごとの生データを取り出す
+    戻り値: [{'channel_class', 'time', 'title', 'image', 'description'}, ...]
+    """
+    return extract_wowow_cells(parse_document(html, backend), backend)
+
+
+def extract_wowow_cells(doc, backend=None):
+    """parse_document() 済みのドキュメントからWOWOWの番組セルの生データを取り出す"""
+    if resolve_backend(backend) == "lxml":
+        return _extract_wowow_cells_lxml(doc)
+    return _extract_wowow_cells_bs4(doc)
+
+
+def _extract_wowow_cells_bs4(soup):
+    selector = ", ".join(f".mdl__program-table td.{cls}" for cls in WOWOW_CHANNEL_CLASSES)
+    cells = []
+    for cell in soup.select(selector):
+        time_tag = cell.select_one('.__time')
+        title_tag = cell.select_one('.__title-text')
+        img_tag = cell.select_one('.__thumb img')
+        desc_tag = cell.select_one('.__lead p')
+        cells.append({
+            'channel_class': next((cls for cls in cell["class"] if cls in WOWOW_CHANNEL_CLASSES), None),
+            'time': time_tag.text.strip() if time_tag else '',
+            'title': title_tag.text.strip() if title_tag else '',
+            'image': img_tag['src'].strip() if img_tag and img_tag.has_attr('src') else '',
+            'description': desc_tag.text.strip() if desc_tag else '',
+        })
+    return cells
+
+
+def _extract_wowow_cells_lxml(root):
+    cells = []
+    for cell in root.xpath(f"//*[{_xpath_class('mdl__program-table')}]//td"):
+        cell_classes = _classes(cell)
+        channel_class = next((cls for cls in cell_classes if cls in WOWOW_CHANNEL_CLASSES), None)
+        if channel_class is None:
+            continue
+
+        # セル内を一度だけ走査して各項目を拾う（それぞれ最初に見つかったものを使う）
+        time_text = title = image = description = None
+        for el in cell.iterdescendants():
+            if not isinstance(el.tag, str):
+                continue
+            classes = _classes(el)
+            if time_text is None and '__time' in classes:
+                time_text = _text(el)
+            if title is None and '__title-text' in classes:
+                title = _text(el)
+            if image is None and el.tag == 'img' and _has_ancestor_class(el, '__thumb', cell):
+                image = (el.get('src') or '').strip()
+            if description is None and el.tag == 'p' and _has_ancestor_class(el, '__lead', cell):
+                description = _text(el)
+
+        cells.append({
+            'channel_class': channel_class,
+            'time': time_text or '',
+            'title': title or '',
+            'image': image or '',
+            'description': description or '',
+        })
+    return cells
+
+
+# ========== アニマックス ==========
+def parse_animax_cells(html, backend=None):
+    """
+    アニマックスの週間番組表ページから番組セルごとの生データを取り出す
+    戻り値: [{'time', 'title', 'episode', 'href'}, ...]
+    """
+    return extract_animax_cells(parse_document(html, backend), backend)
+
+
+def extract_animax_cells(doc, backend=None):
+    """parse_document() 済みのドキュメントからアニマックスの番組セルの生データを取り出す"""
+    if resolve_backend(backend) == "lxml":
+        return _extract_animax_cells_lxml(doc)
+    return _extract_animax_cells_bs4(doc)
+
+
+def _animax_cell_bs4(cell):
+    time_tag = cell.select_one('.m-program-weekly-time')
+    title_tag = cell.select_one('h3')
+    episode_tag = cell.select_one('.m-program-weekly-episode')
+    url_tag = cell.select_one('a')
+    return {
+        'time': time_tag.get_text(strip=True) if time_tag else '',
+        'title': title_tag.get_text(strip=True) if title_tag else '',
+        'episode': episode_tag.get_text(strip=True) if episode_tag else '',
+        'href': (url_tag.get('href') or '') if url_tag else '',
+    }
+
+
+def _extract_animax_cells_bs4(soup):
+    return [_animax_cell_bs4(cell) for cell in soup.select('.m-program-weekly--program')]
+
+
+def _animax_cell_lxml(cell):
+    time_text = title = episode = href = None
+    for el in cell.iterdescendants():
+        if not isinstance(el.tag, str):
+            continue
+        classes = _classes(el)
+        if time_text is None and 'm-program-weekly-time' in classes:
+            time_text = _text_stripped(el)
+        if title is None and el.tag == 'h3':
+            title = _text_stripped(el)
+        if episode is None and 'm-program-weekly-episode' in classes:
+            episode = _text_stripped(el)
+        if href is None and el.tag == 'a':
+            href = el.get('href') or ''
+
+    return {
+        'time': time_text or '',
+        'title': title or '',
+        'episode': episode or '',
+        'href': href or '',
+    }
+
+
+def _extract_animax_cells_lxml(root):
+    return [_animax_cell_lxml(cell) for cell in root.xpath(f"//*[{_xpath_class('m-program-weekly--program')}]")]
+
+
+def parse_animax_days(html, backend=None):
+    """
+    アニマックスの週間番組表ページから日付見出しと日ごとの番組セルを取り出す
+    戻り値: (['4月14日(月)', ...], [[セル, ...], ...])（どちらも画面上の並び順）
+    """
+    return extract_animax_days(parse_document(html, backend), backend)
+
+
+def extract_animax_days(doc, backend=None):
+    """parse_document() 済みのドキュメントから日付見出しと日ごとの番組セルを取り出す"""
+    if resolve_backend(backend) == "lxml":
+        labels = [_text(a) for a in doc.xpath("//*[@id='js-program-header']//a")]
+        containers = doc.xpath(f"//*[@id='{ANIMAX_CONTENTS_ID}']")
+        container = containers[0] if containers else doc
+        cells = container.xpath(f".//*[{_xpath_class('m-program-weekly--program')}]")
+        chains = [_chain_from(cell.iterancestors(), container) for cell in cells]
+        to_cell = _animax_cell_lxml
+    else:
+        labels = [a.get_text(strip=True) for a in doc.select(ANIMAX_HEADER_SELECTOR)]
+        container = doc.find(id=ANIMAX_CONTENTS_ID) or doc
+        cells = container.select('.m-program-weekly--program')
+        chains = [_chain_from(cell.parents, container) for cell in cells]
+        to_cell = _animax_cell_bs4
+    return labels, [[to_cell(cell) for cell in column] for column in _group_by_column(cells, chains)]
+
+
+def _chain_from(ancestors, container):
+    """セルの祖先のうち container より下のものを、container に近い順に並べる"""
+    chain = []
+    for el in ancestors:
+        if el is container:
+            break
+        chain.append(el)
+    chain.reverse()
+    return chain
+
+
+def _group_by_column(cells, chains):
+    """
+    セルを日ごとの列に分ける
+    container から下って最初にセルの祖先が分かれる階層の要素を列とみなす（列のクラス名には依存しない）
+    """
+    if not cells:
+        return []
+    depth = 0
+    while all(len(chain) > depth for chain in chains):
+        if len({id(chain[depth]) for chain in chains}) > 1:
+            break
+        depth += 1
+    else:
+        return [cells]
+
+    columns = {}
+    for cell, chain in zip(cells, chains):
+        columns.setdefault(id(chain[depth]), []).append(cell)
+    return list(columns.values())
+
+
+def parse_animax_thumbnail(html, backend=None):
+    """アニマックスの番組詳細ページからサムネイル画像のURLを取り出す"""
+    return extract_animax_thumbnail(parse_document(html, backend), backend)
+
+
+def extract_animax_thumbnail(doc, backend=None):
+    """parse_document() 済みの番組詳細ページからサムネイル画像のURLを取り出す"""
+    if resolve_backend(backend) == "lxml":
+        imgs = doc.xpath(
+            f"//div[{_xpath_class('p-detail-block')} and {_xpath_class('block-thumbnail')}"
+            f" and {_xpath_class('pc-order-1')}]//figure[{_xpath_class('p-detail-img')}]//img"
+        )
+        return (imgs[0].get('src') or '') if imgs else ''
+
+    img_tag = doc.select_one(ANIMAX_THUMBNAIL_SELECTOR)
+    if img_tag and 'src' in img_tag.attrs:
+        return img_tag['src']
+    return ''
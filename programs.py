@@ -0,0 +1,32 @@
+import sys
+from dataclasses import dataclass
+from operator import attrgetter
+
+
+@dataclass(slots=True)
+class Program:
+    """
+    両スクレイパー共通の番組データ
+    チャンネル名・日付は同じ値の番組が多いため intern して文字列を共有する
+    """
+    channel: str  # 書き込み先のシート名
+    date: str  # 表示用の日付
+    time: str
+    title: str
+    description: str = ''
+    episode: str = ''
+    image_url: str = ''
+    url: str = ''  # 番組詳細ページのURL
+
+    def __post_init__(self):
+        self.channel = sys.intern(self.channel)
+        self.date = sys.intern(self.date)
+
+
+def sheet_rows(programs, columns, channel=None):
+    """
+    番組データをシートの行（columns の属性のタプル）のリストに変換する
+    channel を指定した場合はそのチャンネルの番組だけを返す
+    """
+    row = attrgetter(*columns)
+    return [row(program) for program in programs if channel is None or program.channel == channel]
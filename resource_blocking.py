@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+
+import metrics
+
+# ========== 設定 ==========
+# ブロックするリソースの種類（カンマ区切り・空で無効）
+BLOCK_RESOURCES = os.environ.get("BLOCK_RESOURCES", "images,media,fonts,stylesheets,trackers")
+# ページごとの転送量・読み込み時間のレポート（"0" で無効）
+PAGE_REPORT = os.environ.get("PAGE_REPORT", "1") != "0"
+
+_EXTENSIONS = {
+    "images": ["jpg", "jpeg", "png", "gif", "webp", "avif", "svg", "ico", "bmp"],
+    "media": ["mp4", "webm", "m4v", "mov", "m3u8", "mpd", "mp3", "m4a", "ogg", "wav"],
+    "fonts": ["woff", "woff2", "ttf", "otf", "eot"],
+    "stylesheets": ["css"],
+}
+_TRACKER_HOSTS = [
+    "googletagmanager.com", "google-analytics.com", "analytics.google.com", "doubleclick.net",
+    "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "facebook.net", "connect.facebook.com", "ads-twitter.com", "analytics.twitter.com",
+    "yjtag.jp", "yimg.jp/images/listing", "ads.yahoo.co.jp", "b92.yahoo.co.jp",
+    "criteo.com", "criteo.net", "clarity.ms", "hotjar.com", "adobedtm.com", "omtrdc.net",
+    "krxd.net", "scorecardresearch.com", "tiktok.com/i18n/pixel", "line-scdn.net/tag",
+]
+
+
+def _category_patterns(category):
+    if category == "trackers":
+        return [f"*{host}*" for host in _TRACKER_HOSTS]
+    patterns = []
+    for ext in _EXTENSIONS.get(category, []):
+        # クエリ文字列付きのURLにも一致させる
+        patterns += [f"*.{ext}", f"*.{ext}?*"]
+    return patterns
+
+
+def blocked_url_patterns(categories=None):
+    """ブロック対象の種類（"images,fonts" など）から Network.setBlockedURLs 用のパターンを作る"""
+    if categories is None:
+        categories = BLOCK_RESOURCES
+    if isinstance(categories, str):
+        categories = [c.strip() for c in categories.split(",") if c.strip()]
+    patterns = []
+    for category in categories:
+        if category not in _EXTENSIONS and category != "trackers":
+            logging.warning(f"不明なブロック対象です: {category}")
+            continue
+        patterns += _category_patterns(category)
+    return patterns
+
+
+def enable_resource_blocking(driver, categories=None):
+    """CDPの Network.setBlockedURLs で指定した種類のリソース取得を止める"""
+    patterns = blocked_url_patterns(categories)
+    if not patterns:
+        return []
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {"urls": patterns})
+    logging.debug(f"リソースブロックを有効化しました ({len(patterns)} パターン)")
+    return patterns
+
+
+def collect_network_stats(driver):
+    """
+    前回の呼び出し以降のパフォーマンスログから、リクエスト数・転送バイト数・ブロック数を集計する
+    （WebDriverを goog:loggingPrefs の performance ログ付きで起動している必要がある）
+    """
+    try:
+        entries = driver.get_log("performance")
+    except Exception as e:
+        logging.debug(f"パフォーマンスログを取得できませんでした: {e}")
+        return None
+
+    stats = {'requests': 0, 'bytes': 0, 'blocked': 0, 'failed': 0}
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        method = message.get('method')
+        params = message.get('params', {})
+        if method == 'Network.requestWillBeSent':
+            stats['requests'] += 1
+        elif method == 'Network.loadingFinished':
+            stats['bytes'] += int(params.get('encodedDataLength') or 0)
+        elif method == 'Network.loadingFailed':
+            if params.get('blockedReason'):
+                stats['blocked'] += 1
+            else:
+                stats['failed'] += 1
+    return stats
+
+
+def page_report(driver, label, network=True):
+    """
+    直近に読み込んだページの読み込み時間と転送量をログとメトリクスに記録する
+    network=False の場合は読み込み時間だけを記録する（複数タブを同時に読み込む場合は batch_report() を使う）
+    """
+    if not PAGE_REPORT:
+        return None
+    stats = (collect_network_stats(driver) or {}) if network else {}
+    try:
+        load_ms = driver.execute_script(
+            "const nav = performance.getEntriesByType('navigation')[0];"
+            "return nav ? (nav.loadEventEnd || nav.domContentLoadedEventEnd || nav.duration) : null;"
+        )
+    except Exception:
+        load_ms = None
+
+    if load_ms is not None:
+        metrics.record(f"page.{label}.load", load_ms / 1000)
+    for key in ('requests', 'bytes', 'blocked', 'failed'):
+        if key in stats:
+            metrics.incr(f"page.{label}.{key}", stats[key])
+
+    load_text = f"{load_ms / 1000:.2f}秒" if load_ms is not None else "不明"
+    if stats:
+        logging.info(
+            f"ページ読み込み [{label}]: {load_text} / 転送 {stats['bytes'] / 1024:.1f}KB / "
+            f"リクエスト {stats['requests']} 件 (ブロック {stats['blocked']} 件・失敗 {stats['failed']} 件)"
+        )
+    else:
+        logging.info(f"ページ読み込み [{label}]: {load_text}")
+    return {'load_ms': load_ms, **stats}
+
+
+def batch_report(driver, label, pages):
+    """
+    複数のタブでまとめて読み込んだ pages ページ分の転送量をログとメトリクスに記録する
+    （パフォーマンスログはタブごとではなくWebDriver単位のため、バッチ全体で一度だけ集計する）
+    """
+    if not PAGE_REPORT:
+        return None
+    stats = collect_network_stats(driver)
+    if not stats:
+        return None
+    for key, value in stats.items():
+        metrics.incr(f"page.{label}.{key}", value)
+    logging.info(
+        f"ページ読み込み [{label}] {pages} ページ分: 転送 {stats['bytes'] / 1024:.1f}KB / "
+        f"リクエスト {stats['requests']} 件 (ブロック {stats['blocked']} 件・失敗 {stats['failed']} 件)"
+    )
+    return stats
@@ -0,0 +1,76 @@
+import logging
+import os
+
+import animax  # noqa: F401  取得元を登録する
+import metrics
+import wowow_schedule
+from browser import DriverPool
+from http_client import HTTP_BUDGET, create_session
+from schedule_store import DEFAULT_MAX_AGE, ScheduleStore
+from sheet_sync import write_sheets
+from sources import FetchContext, registered_sources, run_sources
+from thumbnail_cache import ThumbnailCache
+
+# ========== 設定 ==========
+SPREADSHEET_ID = wowow_schedule.SPREADSHEET_ID
+SERVICE_ACCOUNT_FILE = wowow_schedule.SERVICE_ACCOUNT_FILE
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "1"))  # プロセス全体で起動するChromeの上限
+# 前回書き込んだ内容のハッシュの保存先（空で無効。無効時は毎回すべてのシートを同期する）
+SCHEDULE_STORE_FILE = os.environ.get("SCHEDULE_STORE_FILE", "schedule_store.sqlite3")
+# 変更が無くてもこの秒数を超えたシートは同期し直す
+SCHEDULE_STORE_MAX_AGE = int(os.environ.get("SCHEDULE_STORE_MAX_AGE", str(DEFAULT_MAX_AGE)))
+
+
+# ========== メイン処理 ==========
+def main():
+    """
+    登録済みの取得元（sources.register）を並行実行し、前回から変更のあったシートだけをまとめて一度に書き込む
+    チャンネルを増やす場合は sources.Source を実装して register するだけでよい
+    """
+    sources = registered_sources()
+    logging.info(f"取得元: {', '.join(source.label for source in sources)}")
+
+    driver_pool = DriverPool(BROWSER_POOL_SIZE)
+    session = create_session(pool_size=HTTP_BUDGET)
+    cache = ThumbnailCache(animax.THUMBNAIL_CACHE_FILE, ttl=animax.THUMBNAIL_CACHE_TTL,
+                           negative_ttl=animax.THUMBNAIL_CACHE_NEGATIVE_TTL)
+    store = ScheduleStore(SCHEDULE_STORE_FILE, max_age=SCHEDULE_STORE_MAX_AGE) if SCHEDULE_STORE_FILE else None
+
+    context = FetchContext(driver_pool=driver_pool, session=session, thumbnail_cache=cache)
+    try:
+        fetched = run_sources(sources, context)
+    finally:
+        driver_pool.close()
+        session.close()
+        cache.close()
+        cache.log_stats()
+
+    sheets = {}
+    try:
+        for source in sources:
+            programs = fetched.get(source.name)
+            if not programs:
+                continue
+            source_sheets = source.build_sheets(programs)
+            sheets.update(store.changes(source.name, source_sheets) if store else source_sheets)
+        if not sheets:
+            if any(fetched.values()):
+                logging.info("前回の書き込みから変更が無いため、スプレッドシートへの書き込みを省略します。")
+            else:
+                logging.error("書き込むデータがありません。")
+            return
+        with metrics.timed("sheets.write"):
+            write_sheets(SPREADSHEET_ID, SERVICE_ACCOUNT_FILE, sheets)
+        if store:
+            store.mark_written()
+    except Exception as e:
+        logging.error(f"スプレッドシートへの書き込み中にエラーが発生しました: {e}")
+    finally:
+        if store:
+            store.close()
+            store.log_stats()
+        metrics.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+import metrics
+
+# ========== 設定 ==========
+# 変更が無くてもこの秒数を超えたシートは同期し直す（手動編集などの修復用）
+# 毎日の定期実行の間隔（24時間）と同じだと実行時刻のずれで約半数の実行が期限切れになるため、十分長くする
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+HEADER_KEY = ""  # ヘッダー行のハッシュを保存する日付キー
+
+
+def _row_bytes(row):
+    return ("\x1f".join("" if value is None else str(value) for value in row) + "\x1e").encode("utf-8")
+
+
+def hash_rows(header, rows, date_column=0):
+    """
+    シートの行を日付ごとにハッシュ化し、{日付: ハッシュ} を返す
+    ヘッダーは HEADER_KEY に入れ、同じ日付内の行の順序もハッシュに含める
+    """
+    digests = {HEADER_KEY: hashlib.sha1(_row_bytes(header))}
+    for row in rows:
+        date = str(row[date_column])
+        digest = digests.get(date)
+        if digest is None:
+            digest = digests[date] = hashlib.sha1()
+        digest.update(_row_bytes(row))
+    return {date: digest.hexdigest() for date, digest in digests.items()}
+
+
+class ScheduleStore:
+    """
+    取得した番組表の内容ハッシュを (取得元, シート, 日付) ごとに保存するSQLiteベースのストア
+    前回書き込んだ内容と比べて、変更のあったシートだけを書き込み対象にする
+    """
+
+    def __init__(self, path, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.changed = 0
+        self.skipped = 0
+        self._pending = {}  # (取得元, シート) -> {日付: ハッシュ}（書き込み成功後に保存）
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS schedule_hashes ("
+            " source TEXT NOT NULL,"
+            " sheet TEXT NOT NULL,"
+            " date TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " PRIMARY KEY (source, sheet, date))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheet_syncs ("
+            " source TEXT NOT NULL,"
+            " sheet TEXT NOT NULL,"
+            " synced_at REAL NOT NULL,"
+            " PRIMARY KEY (source, sheet))"
+        )
+        self._conn.commit()
+
+    def _load(self, source, sheet):
+        stored = dict(self._conn.execute(
+            "SELECT date, content_hash FROM schedule_hashes WHERE source = ? AND sheet = ?",
+            (source, sheet),
+        ).fetchall())
+        row = self._conn.execute(
+            "SELECT synced_at FROM sheet_syncs WHERE source = ? AND sheet = ?", (source, sheet)
+        ).fetchone()
+        return stored, (row[0] if row else None)
+
+    def changes(self, source, sheets, date_column=0):
+        """
+        {シート名: (ヘッダー, 行)} のうち、前回書き込み時から内容が変わったシートだけを返す
+        （前回の書き込みから max_age 秒を超えたシートは変更が無くても返す）
+        返したシートのハッシュは mark_written() を呼ぶまで保存されない
+        """
+        now = time.time()
+        result = {}
+        for name, (header, rows) in sheets.items():
+            digests = hash_rows(header, rows, date_column)
+            with self._lock:
+                stored, synced_at = self._load(source, name)
+            changed_dates = sorted(date for date in digests.keys() | stored.keys()
+                                   if digests.get(date) != stored.get(date))
+            stale = synced_at is None or now - synced_at > self.max_age
+
+            if not changed_dates and not stale:
+                self.skipped += 1
+                metrics.incr("schedule_store.sheets_skipped")
+                logging.info(f"シート '{name}' は前回の書き込みから変更が無いため書き込みを省略します。")
+                continue
+
+            self.changed += 1
+            metrics.incr("schedule_store.sheets_changed")
+            metrics.incr("schedule_store.dates_changed", len([d for d in changed_dates if d != HEADER_KEY]))
+            if changed_dates:
+                labels = ", ".join(date if date != HEADER_KEY else "ヘッダー" for date in changed_dates)
+                logging.info(f"シート '{name}' の変更: {labels}")
+            else:
+                logging.info(f"シート '{name}' は最後の同期から時間が経っているため同期し直します。")
+            with self._lock:
+                self._pending[(source, name)] = digests
+            result[name] = (header, rows)
+        return result
+
+    def mark_written(self, sheet_names=None):
+        """書き込みに成功したシート（省略時は changes() が返したすべて）のハッシュを保存する"""
+        now = time.time()
+        with self._lock:
+            keys = [key for key in self._pending if sheet_names is None or key[1] in sheet_names]
+            for source, sheet in keys:
+                digests = self._pending.pop((source, sheet))
+                self._conn.execute("DELETE FROM schedule_hashes WHERE source = ? AND sheet = ?", (source, sheet))
+                self._conn.executemany(
+                    "INSERT INTO schedule_hashes (source, sheet, date, content_hash) VALUES (?, ?, ?, ?)",
+                    [(source, sheet, date, content_hash) for date, content_hash in digests.items()],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sheet_syncs (source, sheet, synced_at) VALUES (?, ?, ?)",
+                    (source, sheet, now),
+                )
+            self._conn.commit()
+
+    def close(self):
+        """保存して閉じる（書き込まれなかったシートのハッシュは破棄する）"""
+        with self._lock:
+            self._pending.clear()
+            self._conn.commit()
+            self._conn.close()
+
+    def log_stats(self):
+        """変更のあったシート・省略したシートの件数をログに出力する"""
+        logging.info(f"スケジュールストア: 変更あり {self.changed} シート / 変更なし {self.skipped} シート")
@@ -0,0 +1,265 @@
+import logging
+import threading
+import time
+from difflib import SequenceMatcher
+from itertools import chain
+
+import gspread
+from gspread.utils import absolute_range_name
+from oauth2client.service_account import ServiceAccountCredentials
+
+import metrics
+from http_client import RETRY_STATUS_CODES, backoff_delay
+
+# ========== 設定 ==========
+SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+DEFAULT_SHEET_ROWS = 1000
+DEFAULT_SHEET_COLS = 10
+
+# レート制限(429)・一時的なサーバーエラー時のリトライ設定（対象のステータス・待ち時間の計算は http_client と共通）
+# Sheets API の書き込み上限は1分ごとに回復するため、HTTP取得より多く・長く待つ
+MAX_RETRIES = 6
+BACKOFF_MAX = 64.0  # 秒
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def authorize(service_account_file):
+    """サービスアカウントで認証した gspread クライアントを返す（プロセス内で使い回す）"""
+    with _clients_lock:
+        client = _clients.get(service_account_file)
+        if client is None:
+            with metrics.timed("sheets.auth"):
+                creds = ServiceAccountCredentials.from_json_keyfile_name(service_account_file, SCOPE)
+                client = gspread.authorize(creds)
+            _clients[service_account_file] = client
+            logging.debug(f"Google APIの認証を行いました: {service_account_file}")
+        return client
+
+
+class SpreadsheetApi:
+    """
+    1つのスプレッドシートに対する Sheets API の低レベル呼び出し（gspread.Spreadsheet と同じメソッド名）
+    gspread の open_by_key() は Spreadsheet の生成時にメタデータを取得してシート一覧を捨てるため、
+    sync_spreadsheet() では使わずにAPIを直接呼び出す
+    """
+
+    def __init__(self, http_client, spreadsheet_id):
+        self.http_client = http_client
+        self.id = spreadsheet_id
+
+    def fetch_sheet_metadata(self, params=None):
+        return self.http_client.fetch_sheet_metadata(self.id, params)
+
+    def values_batch_get(self, ranges, params=None):
+        return self.http_client.values_batch_get(self.id, ranges, params)
+
+    def batch_update(self, body):
+        return self.http_client.batch_update(self.id, body)
+
+    def values_batch_update(self, body=None):
+        return self.http_client.values_batch_update(self.id, body)
+
+
+def open_spreadsheet(spreadsheet_id, service_account_file):
+    """スプレッドシートを開く（APIは呼び出さない。存在しない場合は最初の呼び出しでエラーになる）"""
+    return SpreadsheetApi(authorize(service_account_file).http_client, spreadsheet_id)
+
+
+def call_with_backoff(func, *args, **kwargs):
+    """
+    Sheets API呼び出しを実行し、429や5xxが返った場合は指数バックオフで再試行する
+    """
+    name = getattr(func, '__name__', 'call')
+    for attempt in range(MAX_RETRIES + 1):
+        metrics.incr("sheets.api_calls")
+        try:
+            with metrics.timed(f"sheets.{name}"):
+                return func(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            response = getattr(e, 'response', None)
+            status = getattr(response, 'status_code', None)
+            if status not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+                raise
+            metrics.incr("sheets.retries")
+            delay = backoff_delay(attempt, maximum=BACKOFF_MAX)
+            logging.warning(f"Sheets APIエラー ({status})。{delay:.1f}秒後に再試行します ({attempt + 1}/{MAX_RETRIES})")
+            time.sleep(delay)
+
+
+def column_letter(index):
+    """1始まりの列番号を列記号（A, B, ...）に変換する"""
+    letters = ""
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def normalize_row(row, width):
+    """行を width 列に揃える（足りない列は空文字で埋め、余分な列は切り捨てる）"""
+    row = ["" if value is None else str(value) for value in row[:width]]
+    return row + [""] * (width - len(row))
+
+
+def _row_runs(indices):
+    """昇順の行番号を連続した区間 [(開始, 終了), ...]（終了は含まない）にまとめる"""
+    runs = []
+    for i in indices:
+        if runs and runs[-1][1] == i:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    return [tuple(run) for run in runs]
+
+
+def diff_rows(current, desired, width, key_columns=(0, 1, 2)):
+    """
+    現在のシートの値と書き込みたい値（どちらも先頭はヘッダー行）をキー（日付・時間・タイトルなど）で対応付け、
+    行の削除・挿入と、書き換えが必要な範囲を返す
+
+    途中に番組が追加・削除されても後続の行は書き換えず、行の挿入・削除で位置をずらす
+    戻り値: (row_ops, ranges, stats)
+      row_ops: [('delete' または 'insert', 開始行, 終了行), ...]（0始まり・終了行は含まない）
+               下の行から順に並べてあるので、この順に適用すれば行番号がずれない
+      ranges:  [{'range': 'A2:E5', 'values': [...]}, ...]（row_ops 適用後の行番号）
+      stats:   {'added': n, 'removed': n, 'updated': n, 'rewritten': n, 'required_rows': n}
+    """
+    current = [normalize_row(row, width) for row in current]
+    desired = [normalize_row(row, width) for row in desired]
+    last_col = column_letter(width)
+
+    def key(row):
+        return tuple(row[c] for c in key_columns if c < width)
+
+    row_ops = []
+    to_write = []  # 書き込みが必要な desired の行番号
+    if not current or current[0] != desired[0]:
+        to_write.append(0)
+    appended = 0
+    data_end = max(len(current), 1)  # ヘッダー行の次からがデータ
+
+    matcher = SequenceMatcher(None, [key(row) for row in current[1:]], [key(row) for row in desired[1:]],
+                              autojunk=False)
+    # 下の行から処理して、行の削除・挿入で上の行番号がずれないようにする
+    for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+        i1, i2, j1, j2 = i1 + 1, i2 + 1, j1 + 1, j2 + 1  # ヘッダー分ずらす
+        if tag == 'equal':
+            to_write.extend(j for i, j in zip(range(i1, i2), range(j1, j2)) if current[i] != desired[j])
+            continue
+        # 置き換え区間は重なる行数分を上書きし、残りを挿入・削除する
+        overlap = min(i2 - i1, j2 - j1)
+        to_write.extend(range(j1, j2))
+        if i2 - i1 > overlap:
+            row_ops.append(('delete', i1 + overlap, i2))
+        elif j2 - j1 > overlap:
+            if i1 + overlap == data_end:
+                appended += j2 - j1 - overlap  # データの末尾への追加は行を挿入せず書き込むだけ
+            else:
+                row_ops.append(('insert', i1 + overlap, i1 + overlap + j2 - j1 - overlap))
+
+    ranges = [
+        {'range': f"A{start + 1}:{last_col}{end}", 'values': desired[start:end]}
+        for start, end in _row_runs(sorted(to_write))
+    ]
+
+    # キー単位での追加・削除・更新件数を集計
+    def keyed(rows):
+        return {key(row): row for row in rows[1:] if any(row)}
+    current_by_key = keyed(current)
+    desired_by_key = keyed(desired)
+    stats = {
+        'added': len(desired_by_key.keys() - current_by_key.keys()),
+        'removed': len(current_by_key.keys() - desired_by_key.keys()),
+        'updated': sum(1 for k, row in desired_by_key.items()
+                       if k in current_by_key and current_by_key[k] != row),
+        'rewritten': len(to_write),
+        'required_rows': data_end + appended,  # row_ops 適用前に必要なシートの行数
+    }
+    return row_ops, ranges, stats
+
+
+def dimension_request(sheet_id, op, start, end):
+    """diff_rows() の row_ops の1件を batch_update の行削除・挿入リクエストに変換する"""
+    dimension_range = {'sheetId': sheet_id, 'dimension': 'ROWS', 'startIndex': start, 'endIndex': end}
+    if op == 'delete':
+        return {'deleteDimension': {'range': dimension_range}}
+    return {'insertDimension': {'range': dimension_range, 'inheritFromBefore': start > 0}}
+
+
+def sync_spreadsheet(sh, sheets, key_columns=(0, 1, 2)):
+    """
+    複数シートをまとめて差分同期する
+
+    sheets: {シート名: (ヘッダー, 行のリスト)}（各行はリスト・タプルのどちらでもよい）
+    API呼び出しは「メタデータ取得」「現在値の一括取得」「シート作成・行数拡張・行の挿入削除の一括実行」
+    「値の一括書き込み」の最大4回にまとめる
+    戻り値: {シート名: 変更件数}
+    """
+    if not sheets:
+        return {}
+
+    metadata = call_with_backoff(sh.fetch_sheet_metadata)
+    existing = {sheet['properties']['title']: sheet['properties'] for sheet in metadata.get('sheets', [])}
+
+    # 既存シートの現在値を一度に取得
+    current_values = {}
+    existing_names = [name for name in sheets if name in existing]
+    if existing_names:
+        response = call_with_backoff(sh.values_batch_get, [absolute_range_name(name) for name in existing_names])
+        for name, value_range in zip(existing_names, response.get('valueRanges', [])):
+            current_values[name] = value_range.get('values', [])
+
+    requests = []
+    data = []
+    all_stats = {}
+    for name, (header, rows) in sheets.items():
+        width = len(header)
+        desired = chain((header,), rows)  # 列を正規化した行のリストは diff_rows で一度だけ作る
+        current = current_values.get(name, [])
+        row_ops, ranges, stats = diff_rows(current, desired, width, key_columns)
+        needed_rows = stats['required_rows']
+
+        if name not in existing:
+            requests.append({'addSheet': {'properties': {
+                'title': name,
+                'gridProperties': {
+                    'rowCount': max(DEFAULT_SHEET_ROWS, needed_rows),
+                    'columnCount': max(DEFAULT_SHEET_COLS, width),
+                },
+            }}})
+            logging.info(f"シート '{name}' を作成します。")
+        elif needed_rows > existing[name]['gridProperties']['rowCount']:
+            requests.append({'updateSheetProperties': {
+                'properties': {'sheetId': existing[name]['sheetId'], 'gridProperties': {'rowCount': needed_rows}},
+                'fields': 'gridProperties.rowCount',
+            }})
+        if name in existing:
+            requests.extend(dimension_request(existing[name]['sheetId'], *op) for op in row_ops)
+
+        all_stats[name] = stats
+        metrics.incr("sheets.rows_rewritten", stats['rewritten'])
+        for r in ranges:
+            data.append({'range': absolute_range_name(name, r['range']), 'values': r['values']})
+
+        if ranges or row_ops:
+            logging.info(
+                f"✅ {name}: 追加 {stats['added']} 件 / 更新 {stats['updated']} 件 / 削除 {stats['removed']} 件 "
+                f"({len(ranges)} 範囲・{stats['rewritten']} 行を書き換え・行の挿入削除 {len(row_ops)} 回)"
+            )
+        else:
+            logging.info(f"シート '{name}' に変更はありません。")
+
+    if requests:
+        call_with_backoff(sh.batch_update, {'requests': requests})
+    if data:
+        call_with_backoff(sh.values_batch_update, {'valueInputOption': 'RAW', 'data': data})
+
+    return all_stats
+
+
+def write_sheets(spreadsheet_id, service_account_file, sheets, key_columns=(0, 1, 2)):
+    """スプレッドシートを開いて複数シートをまとめて差分同期する"""
+    sh = open_spreadsheet(spreadsheet_id, service_account_file)
+    return sync_spreadsheet(sh, sheets, key_columns)
@@ -0,0 +1,133 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+
+import metrics
+from http_client import HTTP_BUDGET, fetch_html_with_retries, map_concurrently
+from programs import sheet_rows
+
+# ========== 設定 ==========
+SOURCE_WORKERS = int(os.environ.get("SOURCE_WORKERS", "4"))  # 同時に取得する取得元の数
+ENABLED_SOURCES = os.environ.get("SOURCES", "")  # 実行する取得元の名前（カンマ区切り・空ならすべて）
+
+_registry = {}
+
+
+@dataclass
+class FetchContext:
+    """
+    取得元に渡す共有リソース
+    ブラウザ・HTTPの同時実行数はここに入れたプール・セッションを通じてプロセス全体で制限される
+    """
+    driver_pool: object  # browser.DriverPool（Chromeの起動数の上限）
+    session: object  # requests.Session（HTTP_BUDGET 本の接続を共有）
+    thumbnail_cache: object = None  # thumbnail_cache.ThumbnailCache（任意）
+
+
+class Source:
+    """
+    番組表の取得元（チャンネル）のアダプタ
+
+    fetch(context) で番組表を取得・解析して Program のリストを返し、
+    build_sheets(programs) で書き込むシートの行に変換する
+    """
+    name = ""  # 一意な名前（SOURCES での指定・スケジュールストアのキーに使う）
+    label = ""  # ログ用の表示名
+    sheet_names = ()  # 書き込むシート名（Program.channel と一致させる）
+    sheet_header = ()
+    sheet_columns = ()  # sheet_header に対応する Program の属性
+
+    def fetch(self, context):
+        """番組表を取得し、Program のリストを返す"""
+        raise NotImplementedError
+
+    def parse(self, html, date):
+        """
+        1ページ分のHTMLから Program のリストを取り出す（ブラウザ・ネットワーク不要）
+        date: ページの日付（datetime.date。複数日が載るページでは取り出す最初の日）
+        """
+        raise NotImplementedError
+
+    def build_sheets(self, programs):
+        """番組データをシートごとに振り分け、{シート名: (ヘッダー, 行のリスト)} を返す"""
+        channels = {program.channel for program in programs}
+        return {
+            name: (list(self.sheet_header), sheet_rows(programs, self.sheet_columns, channel=name))
+            for name in self.sheet_names if name in channels
+        }
+
+
+class HttpSource(Source):
+    """
+    日付ごとのページをHTTPで取得して parse() するだけの取得元（ブラウザ不要）
+    pages() と parse() を実装すればチャンネルを追加できる
+    """
+
+    def pages(self, today):
+        """today（datetime.date）から取得するページの [(URL, 日付), ...] を返す（日付は parse() に渡す date）"""
+        raise NotImplementedError
+
+    def fetch(self, context):
+        pages = self.pages(date.today())
+
+        def fetch_page(page):
+            url, page_date = page
+            return self.parse(fetch_html_with_retries(context.session, url), page_date)
+
+        results = map_concurrently(fetch_page, pages, min(len(pages), HTTP_BUDGET))
+        return [program for page in pages for program in results.get(page) or []]
+
+
+def register(source_class):
+    """取得元のクラスを登録するデコレータ"""
+    source = source_class()
+    if source.name in _registry:
+        raise ValueError(f"取得元 '{source.name}' は既に登録されています。")
+    _registry[source.name] = source
+    return source_class
+
+
+def registered_sources(names=None):
+    """
+    登録済みの取得元を登録順に返す
+    names（カンマ区切りまたはリスト。省略時は SOURCES）を指定した場合はその取得元だけを返す
+    """
+    names = ENABLED_SOURCES if names is None else names
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(",") if name.strip()]
+    if not names:
+        return list(_registry.values())
+    unknown = [name for name in names if name not in _registry]
+    if unknown:
+        logging.warning(f"未登録の取得元を無視します: {', '.join(unknown)}")
+    return [source for name, source in _registry.items() if name in names]
+
+
+def _fetch_source(source, context):
+    with metrics.timed(f"{source.name}.fetch"):
+        programs = source.fetch(context)
+    if not programs:
+        logging.error(f"{source.label}: 番組データを取得できませんでした。")
+        return []
+    logging.info(f"{source.label}: 取得番組数: {len(programs)}")
+    return programs
+
+
+def run_sources(sources, context, workers=SOURCE_WORKERS):
+    """
+    取得元を最大 workers 個ずつ並行して取得し、{取得元の名前: Program のリスト} を返す
+    失敗した取得元は結果に含めない
+    """
+    results = {}
+    if not sources:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(sources)))) as executor:
+        futures = {source.name: (source, executor.submit(_fetch_source, source, context)) for source in sources}
+        for name, (source, future) in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logging.error(f"{source.label} の取得中にエラーが発生しました: {e}")
+    return results
@@ -0,0 +1,119 @@
+from datetime import date, datetime
+
+import pytest
+
+import animax
+import parsers
+
+
+def cells(count, prefix="番組"):
+    return [{'time': f"{i:02d}:00", 'title': f"{prefix}{i}", 'episode': "", 'href': ""} for i in range(count)]
+
+
+# ========== parse_day_label ==========
+@pytest.mark.parametrize("label, today, expected", [
+    ("4月14日(月)", datetime(2025, 4, 14), date(2025, 4, 14)),
+    (" 12月31日(火) ", datetime(2024, 12, 30), date(2024, 12, 31)),
+    ("1月1日(水)", datetime(2024, 12, 30), date(2025, 1, 1)),  # 年末に見た翌週
+    ("12月29日(日)", datetime(2025, 1, 2), date(2024, 12, 29)),  # 年始に見た前週
+    ("2月29日(木)", datetime(2024, 2, 27), date(2024, 2, 29)),
+])
+def test_parse_day_label(label, today, expected):
+    assert animax.parse_day_label(label, today) == expected
+
+
+@pytest.mark.parametrize("label", ["本日", "", "2月30日(日)", "13月1日"])
+def test_parse_day_label_unreadable(label):
+    assert animax.parse_day_label(label, datetime(2025, 2, 1)) is None
+
+
+# ========== assign_dates ==========
+def test_assign_dates_matches_labels_to_columns():
+    today = datetime(2024, 12, 30)
+    labels = ["12月30日(月)", "12月31日(火)", "1月1日(水)"]
+    columns = [cells(2, "a"), cells(1, "b"), cells(3, "c")]
+    assert animax.assign_dates(labels, columns, today) == [
+        (date(2024, 12, 30), columns[0]),
+        (date(2024, 12, 31), columns[1]),
+        (date(2025, 1, 1), columns[2]),
+    ]
+
+
+@pytest.mark.parametrize("labels, columns", [
+    (["4月14日(月)", "4月15日(火)"], [cells(100)]),  # 列を読み取れず1列にまとまった
+    (["4月14日(月)"], [cells(48), cells(52)]),  # 見出しと列の数が合わない
+    (["4月14日(月)", "本日"], [cells(48), cells(52)]),  # 読み取れない見出しがある
+    ([], [cells(48), cells(52)]),
+])
+def test_assign_dates_falls_back_to_slots_per_day(labels, columns):
+    dated = animax.assign_dates(labels, columns, datetime(2025, 4, 14, 5, 0))
+    assert [day for day, _ in dated] == [date(2025, 4, 14), date(2025, 4, 15), date(2025, 4, 16)]
+    assert [len(day_cells) for _, day_cells in dated] == [48, 48, 4]
+    assert [cell for _, day_cells in dated for cell in day_cells] == [cell for column in columns for cell in column]
+
+
+def test_assign_dates_empty():
+    assert animax.assign_dates([], [], datetime(2025, 4, 14)) == []
+
+
+# ========== select_days ==========
+def test_select_days_keeps_days_from_today():
+    dated = [(date(2024, 12, 29), ["a"]), (date(2024, 12, 30), ["b"]),
+             (date(2024, 12, 31), ["c"]), (date(2025, 1, 1), ["d"])]
+    today = datetime(2024, 12, 30, 23, 59)
+    assert animax.select_days(dated, today, 2) == dated[1:3]
+    assert animax.select_days(dated, today, 7) == dated[1:]
+    assert animax.select_days(dated, today, 0) == []
+
+
+# ========== _group_by_column ==========
+COLUMNS_HTML = """
+<div id="js-program-contents-weekly">
+  <div class="outer"><div class="inner">
+    {columns}
+  </div></div>
+</div>
+"""
+
+
+def weekly_html(columns, wrap):
+    parts = []
+    for day, titles in enumerate(columns):
+        programs = "".join(
+            f'<div class="m-program-weekly--program"><a href="/p/{day}"><h3>{title}</h3></a></div>' for title in titles)
+        parts.append(wrap.format(programs=programs))
+    return COLUMNS_HTML.format(columns="".join(parts))
+
+
+@pytest.mark.parametrize("backend", parsers.BACKENDS)
+@pytest.mark.parametrize("wrap", [
+    '<div class="day">{programs}</div>',
+    '<section><div class="day"><div class="list"><ul><li>{programs}</li></ul></div></div></section>',
+])
+def test_group_by_column_with_nested_wrappers(backend, wrap):
+    html = weekly_html([["a1", "a2"], ["b1"], ["c1", "c2", "c3"]], wrap)
+    _, columns = parsers.parse_animax_days(html, backend)
+    assert [[cell['title'] for cell in column] for column in columns] == [["a1", "a2"], ["b1"], ["c1", "c2", "c3"]]
+
+
+@pytest.mark.parametrize("backend", parsers.BACKENDS)
+def test_group_by_column_single_column(backend):
+    _, columns = parsers.parse_animax_days(weekly_html([["a1", "a2", "a3"]], '<div class="day">{programs}</div>'), backend)
+    assert [[cell['title'] for cell in column] for column in columns] == [["a1", "a2", "a3"]]
+
+
+@pytest.mark.parametrize("backend", parsers.BACKENDS)
+def test_group_by_column_flat_cells(backend):
+    # 列の要素が無く、セルがコンテナ直下に並ぶ場合は1列として扱う
+    html = '<div id="js-program-contents-weekly">' + "".join(
+        f'<div class="m-program-weekly--program"><h3>{i}</h3></div>' for i in range(3)) + '</div>'
+    _, columns = parsers.parse_animax_days(html, backend)
+    assert [len(column) for column in columns] == [3]
+
+
+def test_group_by_column_uneven_depth():
+    # 同じ列の中でセルの深さが違っても、最初に分かれる階層で列を決める
+    day1, day2, extra = object(), object(), object()
+    chains = [[day1], [day1, extra], [day2]]
+    assert parsers._group_by_column(["a", "b", "c"], chains) == [["a", "b"], ["c"]]
+    assert parsers._group_by_column([], []) == []
@@ -0,0 +1,124 @@
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException
+
+import animax
+
+DETAIL_HTML = ('<div class="p-detail-block block-thumbnail pc-order-1">'
+               '<figure class="p-detail-img"><img src="{url}.jpg"></figure></div>')
+
+
+class FakeDriver:
+    """
+    タブでの取得に必要な WebDriver の操作だけを実装した代替
+    outcomes: {番組URL: [訪問ごとの結果, ...]}（"ok"・"fail"（読み込みエラー）・"crash"（WebDriverが落ちる）。尽きたら "ok"）
+    """
+
+    def __init__(self, outcomes=None):
+        self.outcomes = outcomes if outcomes is not None else {}
+        self.visits = []
+        self.crashed = False
+        self.handles = {"main": None}
+        self.current = "main"
+        self.switch_to = self
+
+    def _check(self):
+        if self.crashed:
+            raise InvalidSessionIdException("invalid session id")
+
+    @property
+    def current_window_handle(self):
+        self._check()
+        return self.current
+
+    @property
+    def window_handles(self):
+        self._check()
+        return list(self.handles)
+
+    def execute_script(self, script, *args):
+        self._check()
+        if script.startswith("window.open"):
+            handle = f"tab{len(self.handles)}"
+            self.handles[handle] = args[0]
+        return None
+
+    def window(self, handle):
+        self._check()
+        self.current = handle
+        url = self.handles[handle]
+        if isinstance(url, str):  # 開いてから初めて切り替えたタブだけ読み込む
+            outcomes = self.outcomes.get(url) or []
+            outcome = outcomes.pop(0) if outcomes else "ok"
+            self.visits.append((url, outcome))
+            if outcome == "crash":
+                self.crashed = True
+                self._check()
+            self.handles[handle] = (url, outcome)
+
+    def find_element(self, by, value):
+        self._check()
+        _, outcome = self.handles[self.current]
+        if outcome == "fail":
+            raise RuntimeError("ページを読み込めませんでした")
+        return object()
+
+    @property
+    def page_source(self):
+        url, _ = self.handles[self.current]
+        return DETAIL_HTML.format(url=url)
+
+    def close(self):
+        self._check()
+        del self.handles[self.current]
+
+    def get_log(self, kind):
+        return []
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(animax.time, "sleep", lambda seconds: None)
+
+
+def test_crashed_batch_is_retried_on_replacement_driver():
+    first = FakeDriver({"b": ["crash"]})
+    second = FakeDriver()
+    restarted = []
+
+    def restart(driver):
+        restarted.append(driver)
+        return second
+
+    recorded = {}
+    results = animax.fetch_thumbnail_urls_with_tabs(first, ["a", "b", "c", "d"], tabs=4, restart_driver=restart,
+                                                    on_result=recorded.__setitem__)
+    assert restarted == [first]
+    assert results == {url: f"{url}.jpg" for url in "abcd"}
+    # 落ちる前に取得できた分は再取得せず、途中結果として保存される
+    assert [url for url, _ in first.visits] == ["a", "b"]
+    assert [url for url, _ in second.visits] == ["b", "c", "d"]
+    assert recorded == results
+
+
+def test_failed_restart_returns_partial_results():
+    driver = FakeDriver({"c": ["crash"]})
+
+    def restart(driver):
+        raise RuntimeError("Chromeを起動できません")
+
+    recorded = {}
+    results = animax.fetch_thumbnail_urls_with_tabs(driver, ["a", "b", "c", "d", "e"], tabs=4,
+                                                    restart_driver=restart, on_result=recorded.__setitem__)
+    assert results == {"a": "a.jpg", "b": "b.jpg"}
+    assert recorded == results
+
+
+def test_failed_items_are_retried_up_to_limit(monkeypatch):
+    monkeypatch.setattr(animax, "THUMBNAIL_RETRIES", 2)
+    driver = FakeDriver({"flaky": ["fail"], "broken": ["fail"] * 10})
+    results = animax.fetch_thumbnail_urls_with_tabs(driver, ["ok", "flaky", "broken"], tabs=2)
+    assert results == {"ok": "ok.jpg", "flaky": "flaky.jpg"}
+    visits = [url for url, _ in driver.visits]
+    assert visits.count("ok") == 1
+    assert visits.count("flaky") == 2
+    assert visits.count("broken") == 3  # 初回 + 再試行 THUMBNAIL_RETRIES 回
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import browser
+
+pytestmark = pytest.mark.skipif(browser.fcntl is None, reason="fcntl が無い")
+
+HOLD_LOCK = """
+import fcntl, sys
+lock_file = open(sys.argv[1], "a")
+fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+print("locked", flush=True)
+sys.stdin.read()
+"""
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(browser, "CHROME_PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(browser, "_profile_locks", {})
+    yield tmp_path
+    for lock_file in browser._profile_locks.values():
+        lock_file.close()
+
+
+def leave_stale_lock(profile_dir, slot=0):
+    path = profile_dir / f"slot-{slot}"
+    path.mkdir()
+    os.symlink("otherhost-12345", path / "SingletonLock")
+    return path
+
+
+def test_removes_stale_singleton_files_when_slot_is_free(profile_dir):
+    path = leave_stale_lock(profile_dir)
+    assert browser._prepare_profile_dir(0) == str(path)
+    assert not os.path.lexists(path / "SingletonLock")
+    # 同じプロセス内での再起動では同じプロファイルを使い続ける
+    assert browser._prepare_profile_dir(0) == str(path)
+
+
+def test_uses_temporary_profile_when_other_process_holds_slot(profile_dir):
+    path = leave_stale_lock(profile_dir)
+    holder = subprocess.Popen([sys.executable, "-c", HOLD_LOCK, str(profile_dir / "slot-0.lock")],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        temporary = browser._prepare_profile_dir(0)
+        assert temporary != str(path) and os.path.isdir(temporary)
+        assert os.path.lexists(path / "SingletonLock")  # 使用中のChromeのロックは消さない
+        assert browser._prepare_profile_dir(1) == str(profile_dir / "slot-1")
+    finally:
+        holder.stdin.close()
+        holder.wait(5)
+    assert browser._prepare_profile_dir(0) == str(path)
@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+import browser
+
+
+class FakeDriver:
+    def __init__(self, slot):
+        self.slot = slot
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeCreate:
+    """create_driver の代わり（fail に入れた回数目の起動を失敗させる）"""
+
+    def __init__(self, fail=(), gate=None):
+        self.calls = 0
+        self.fail = set(fail)
+        self.gate = gate
+        self.lock = threading.Lock()
+
+    def __call__(self, profile_slot=0, **kwargs):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        if self.gate is not None:
+            self.gate.wait(5)
+        if call in self.fail:
+            raise RuntimeError("Chromeを起動できません")
+        return FakeDriver(profile_slot)
+
+
+def borrow_in_thread(pool, results):
+    def run():
+        try:
+            with pool.driver() as driver:
+                results.append(driver)
+        except Exception as e:
+            results.append(e)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_reuses_returned_driver(monkeypatch):
+    create = FakeCreate()
+    monkeypatch.setattr(browser, "create_driver", create)
+    pool = browser.DriverPool(1)
+    with pool.driver() as first:
+        pass
+    with pool.driver() as second:
+        pass
+    assert first is second
+    assert create.calls == 1
+
+
+def test_waiter_starts_driver_when_other_start_fails(monkeypatch):
+    gate = threading.Event()
+    create = FakeCreate(fail={1}, gate=gate)
+    monkeypatch.setattr(browser, "create_driver", create)
+    pool = browser.DriverPool(1)
+
+    results = []
+    starter = borrow_in_thread(pool, results)
+    while create.calls < 1:
+        pass
+    waiter = borrow_in_thread(pool, results)
+    gate.set()
+    starter.join(5)
+    waiter.join(5)
+
+    assert not starter.is_alive() and not waiter.is_alive()
+    assert isinstance(results[0], RuntimeError)
+    assert isinstance(results[1], FakeDriver)
+
+
+def test_waiter_starts_driver_when_restart_fails(monkeypatch):
+    create = FakeCreate(fail={2})
+    monkeypatch.setattr(browser, "create_driver", create)
+    pool = browser.DriverPool(1)
+
+    results = []
+    with pool.driver() as driver:
+        waiter = borrow_in_thread(pool, results)
+        with pytest.raises(RuntimeError):
+            pool.restart(driver)
+        assert driver.quit_called
+    waiter.join(5)
+
+    assert not waiter.is_alive()
+    assert len(results) == 1 and isinstance(results[0], FakeDriver)
+    assert results[0] is not driver
+
+
+def test_restart_returns_replacement_to_pool(monkeypatch):
+    monkeypatch.setattr(browser, "create_driver", FakeCreate())
+    pool = browser.DriverPool(1)
+    with pool.driver() as driver:
+        new_driver = pool.restart(driver)
+        assert new_driver.slot == driver.slot
+    with pool.driver() as again:
+        assert again is new_driver
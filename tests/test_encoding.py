@@ -0,0 +1,47 @@
+import pytest
+from bs4 import BeautifulSoup
+
+import parsers
+from http_client import decode_html
+
+LATE_META = '<html><head><title>映画</title><meta charset="utf-8"></head><body><h3>映画</h3></body></html>'
+SHIFT_JIS = '<html><body><h3>映画の番組表です。本日の放送予定</h3></body></html>'
+
+
+class FakeResponse:
+    def __init__(self, content, content_type, apparent_encoding="utf-8"):
+        self.content = content
+        self.headers = {"Content-Type": content_type}
+        # requests は charset の無い text/html に ISO-8859-1 を設定する
+        self.encoding = content_type.split("charset=")[1] if "charset=" in content_type else "ISO-8859-1"
+        self.apparent_encoding = apparent_encoding
+
+
+def heading(document):
+    if isinstance(document, BeautifulSoup):
+        return document.h3.get_text()
+    return document.findtext(".//h3")
+
+
+@pytest.mark.parametrize("backend", parsers.BACKENDS)
+def test_parse_document_uses_late_meta_charset(backend):
+    assert heading(parsers.parse_document(LATE_META.encode("utf-8"), backend)) == "映画"
+
+
+@pytest.mark.parametrize("backend", parsers.BACKENDS)
+def test_parse_document_accepts_str(backend):
+    assert heading(parsers.parse_document(LATE_META, backend)) == "映画"
+
+
+def test_decode_html_prefers_http_charset():
+    response = FakeResponse(SHIFT_JIS.encode("shift_jis"), "text/html; charset=Shift_JIS")
+    assert decode_html(response) == SHIFT_JIS
+
+
+def test_decode_html_uses_meta_charset_without_http_charset():
+    assert decode_html(FakeResponse(LATE_META.encode("utf-8"), "text/html")) == LATE_META
+
+
+def test_decode_html_falls_back_to_apparent_encoding():
+    response = FakeResponse(SHIFT_JIS.encode("shift_jis"), "text/html", apparent_encoding="shift_jis")
+    assert decode_html(response) == SHIFT_JIS
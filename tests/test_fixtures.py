@@ -0,0 +1,132 @@
+import os
+from datetime import date, datetime
+
+import pytest
+
+import animax
+import parsers
+import wowow_schedule
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BENCHMARK_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(FIXTURES_DIR)), "benchmarks", "fixtures")
+
+
+def load(name, directory=FIXTURES_DIR):
+    with open(os.path.join(directory, name), "rb") as f:
+        return f.read()
+
+
+def sheet_rows(sheets):
+    return {name: (list(header), [list(row) for row in rows]) for name, (header, rows) in sheets.items()}
+
+
+# ========== WOWOW ==========
+@pytest.mark.parametrize("backend", parsers.BACKENDS)
+def test_wowow_cells(backend):
+    cells = parsers.parse_wowow_cells(load("wowow_20250414.html"), backend)
+    assert [(cell['channel_class'], cell['time']) for cell in cells] == [
+        ("__prime", "05:00"), ("__live", "05:15"), ("__cinema", "05:30"),
+        ("__live", "06:00"), ("__cinema", "06:40"),
+        ("__prime", "07:00"), ("__live", "07:00"), ("__cinema", ""),
+    ]
+    assert cells[0] == {
+        'channel_class': "__prime",
+        'time': "05:00",
+        'title': "連続ドラマW 名探偵の事件簿 第3話",
+        'image': "https://www.wowow.co.jp/img/prime/103001.jpg",
+        'description': "消えた証人を追う二人。&事件は思わぬ方向へ…",
+    }
+    assert cells[1]['image'] == "" and cells[1]['description'] == ""
+    assert cells[2]['title'] == "海辺のカフェ物語 <字幕版>"
+    assert cells[2]['description'] == "港町の小さなカフェを舞台にした群像劇。監督：山田太郎"
+    assert cells[3]['image'] == ""
+    assert cells[4]['description'] == "若き騎士の旅立ち。"
+
+
+def test_wowow_build_sheets():
+    programs = wowow_schedule.parse_schedule_page(load("wowow_20250414.html"), "2025/04/14")
+    sheets = sheet_rows(wowow_schedule.build_sheets(programs))
+    assert list(sheets) == wowow_schedule.SHEET_NAMES
+    header, rows = sheets["WOWOWプライム"]
+    assert header == wowow_schedule.SHEET_HEADER
+    assert rows == [
+        ["2025/04/14", "05:00", "連続ドラマW 名探偵の事件簿 第3話", "消えた証人を追う二人。&事件は思わぬ方向へ…",
+         "https://www.wowow.co.jp/img/prime/103001.jpg"],
+        ["2025/04/14", "07:00", "WOWOWぷらすと", "今週のおすすめ番組を紹介。", ""],
+    ]
+    assert [row[2] for row in sheets["WOWOWライブ"][1]] == [
+        "欧州サッカー ハイライト", "ライブ・セレクション", "テニス 全仏オープン 1回戦"]
+    assert [row[1] for row in sheets["WOWOWシネマ"][1]] == ["05:30", "06:40", ""]
+
+
+def test_wowow_next_day_url():
+    url = wowow_schedule.find_next_day_url(load("wowow_20250414.html"), "https://www.wowow.co.jp/schedule/20250414")
+    assert url == "https://www.wowow.co.jp/schedule/20250415"
+
+
+# ========== アニマックス ==========
+@pytest.mark.parametrize("backend", parsers.BACKENDS)
+def test_animax_days(backend):
+    labels, day_cells = parsers.parse_animax_days(load("animax_schedule_weekly.html"), backend)
+    assert labels == ["12月29日(日)", "12月30日(月)", "12月31日(火)", "1月1日(水)", "1月2日(木)"]
+    assert [len(cells) for cells in day_cells] == [2, 1, 2, 1, 1]
+    assert day_cells[0][0] == {
+        'time': "23:00", 'title': "名探偵の事件簿新", 'episode': "#12", 'href': "/programs/detail/1201"}
+    assert day_cells[0][1]['episode'] == ""
+    assert day_cells[1][0]['href'] == "https://www.animax.co.jp/programs/detail/1301"
+
+
+def test_animax_build_sheets():
+    today = datetime(2024, 12, 30, 5, 0)
+    labels, day_cells = parsers.parse_animax_days(load("animax_schedule_weekly.html"))
+    dated_cells = animax.select_days(animax.assign_dates(labels, day_cells, today), today, 3)
+    assert [day for day, _ in dated_cells] == [date(2024, 12, 30), date(2024, 12, 31), date(2025, 1, 1)]
+
+    sheets = sheet_rows(animax.build_sheets(animax.build_programs(dated_cells)))
+    header, rows = sheets[animax.SHEET_NAME]
+    assert header == animax.SHEET_HEADER
+    assert rows == [
+        ["12月30日(月)", "00:00", "宇宙戦艦の航跡", "#1", ""],
+        ["12月31日(火)", "00:00", "年末特番 魔法少女の放課後 一挙放送", "#1～#6", ""],
+        ["12月31日(火)", "03:00", "ロボット大戦", "#24", ""],
+        ["1月1日(水)", "00:00", "新春 異世界ぐらしの記録", "", ""],
+    ]
+
+
+def test_animax_program_urls_are_absolute():
+    labels, day_cells = parsers.parse_animax_days(load("animax_schedule_weekly.html"))
+    programs = animax.build_programs(animax.assign_dates(labels, day_cells, datetime(2024, 12, 30)))
+    assert [program.url for program in programs][:3] == [
+        "https://www.animax.co.jp/programs/detail/1201",
+        "https://www.animax.co.jp/programs/detail/1202",
+        "https://www.animax.co.jp/programs/detail/1301",
+    ]
+
+
+@pytest.mark.parametrize("backend", parsers.BACKENDS)
+def test_animax_thumbnail(backend):
+    thumbnail = parsers.parse_animax_thumbnail(load("animax_detail_1201.html"), backend)
+    assert thumbnail == "https://www.animax.co.jp/uploads/programs/1201/main.jpg"
+
+
+# ========== バックエンド間の一致 ==========
+@pytest.mark.skipif(len(parsers.BACKENDS) < 2, reason="lxml が無い")
+@pytest.mark.parametrize("name, directory", [
+    ("wowow_20250414.html", FIXTURES_DIR),
+    ("animax_schedule_weekly.html", FIXTURES_DIR),
+    ("animax_detail_1201.html", FIXTURES_DIR),
+    ("wowow_day.html", BENCHMARK_FIXTURES_DIR),
+    ("animax_weekly.html", BENCHMARK_FIXTURES_DIR),
+    ("animax_detail.html", BENCHMARK_FIXTURES_DIR),
+])
+def test_backends_agree(name, directory):
+    html = load(name, directory)
+    if name.startswith("wowow"):
+        extract = parsers.parse_wowow_cells
+    elif "detail" in name:
+        extract = parsers.parse_animax_thumbnail
+    else:
+        extract = parsers.parse_animax_days
+    results = [extract(html, backend) for backend in parsers.BACKENDS]
+    assert results[0]
+    assert all(result == results[0] for result in results[1:])
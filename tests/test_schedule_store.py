@@ -0,0 +1,138 @@
+import pytest
+
+import schedule_store
+from schedule_store import HEADER_KEY, ScheduleStore, hash_rows
+
+HEADER = ["日付", "時間", "タイトル"]
+DAY = 24 * 60 * 60
+
+
+def make_rows(dates, per_day=3):
+    return [(date, f"{slot:02d}:00", f"番組{date}-{slot}") for date in dates for slot in range(per_day)]
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(schedule_store.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    store = ScheduleStore(str(tmp_path / "store.sqlite3"), max_age=7 * DAY)
+    yield store
+    store.close()
+
+
+def written(store, rows, name="S"):
+    """rows を書き込み済みの状態にする"""
+    assert store.changes("src", {name: (HEADER, rows)})
+    store.mark_written()
+
+
+def test_hash_rows_groups_rows_by_date():
+    rows = make_rows(["4月14日", "4月15日"])
+    digests = hash_rows(HEADER, rows)
+    assert set(digests) == {HEADER_KEY, "4月14日", "4月15日"}
+
+    changed = list(rows)
+    changed[4] = ("4月15日", "01:00", "差し替え")
+    new_digests = hash_rows(HEADER, changed)
+    assert new_digests["4月14日"] == digests["4月14日"]
+    assert new_digests["4月15日"] != digests["4月15日"]
+    # 同じ日付内の並び順もハッシュに含める
+    assert hash_rows(HEADER, rows[:3][::-1] + rows[3:])["4月14日"] != digests["4月14日"]
+
+
+def test_unchanged_sheet_is_skipped(store):
+    rows = make_rows(["4月14日", "4月15日"])
+    written(store, rows)
+    assert store.changes("src", {"S": (HEADER, list(rows))}) == {}
+    assert store.skipped == 1
+
+
+def test_changed_date_is_reported(store, caplog):
+    rows = make_rows(["4月14日", "4月15日"])
+    written(store, rows)
+    changed = rows[:3] + [("4月15日", "00:00", "新番組")] + rows[4:]
+    with caplog.at_level("INFO"):
+        result = store.changes("src", {"S": (HEADER, changed)})
+    assert result == {"S": (HEADER, changed)}
+    assert "シート 'S' の変更: 4月15日" in caplog.text
+
+
+def test_removed_date_is_detected(store, caplog):
+    rows = make_rows(["4月14日", "4月15日", "4月16日"])
+    written(store, rows)
+    with caplog.at_level("INFO"):
+        result = store.changes("src", {"S": (HEADER, rows[3:])})
+    assert list(result) == ["S"]
+    assert "シート 'S' の変更: 4月14日" in caplog.text
+
+
+def test_header_change_is_detected(store):
+    rows = make_rows(["4月14日"])
+    written(store, rows)
+    assert list(store.changes("src", {"S": (HEADER + ["説明"], rows)})) == ["S"]
+
+
+def test_stale_sheet_is_synced_again(store, clock):
+    rows = make_rows(["4月14日"])
+    written(store, rows)
+    clock.now += 7 * DAY - 60
+    assert store.changes("src", {"S": (HEADER, rows)}) == {}
+    clock.now += 120
+    assert list(store.changes("src", {"S": (HEADER, rows)})) == ["S"]
+    store.mark_written()
+    assert store.changes("src", {"S": (HEADER, rows)}) == {}
+
+
+def test_daily_runs_are_not_stale_with_default_max_age(tmp_path, clock):
+    store = ScheduleStore(str(tmp_path / "store.sqlite3"))
+    try:
+        rows = make_rows(["4月14日"])
+        written(store, rows)
+        for _ in range(3):
+            clock.now += DAY + 15 * 60  # 定期実行の開始時刻のずれ
+            assert store.changes("src", {"S": (HEADER, rows)}) == {}
+    finally:
+        store.close()
+
+
+def test_hashes_are_not_saved_without_mark_written(tmp_path, clock):
+    path = str(tmp_path / "store.sqlite3")
+    rows = make_rows(["4月14日"])
+    store = ScheduleStore(path)
+    written(store, rows)
+    changed = [("4月14日", "00:00", "差し替え")] + rows[1:]
+    assert store.changes("src", {"S": (HEADER, changed)})
+    store.close()  # 書き込みに失敗した場合は mark_written() を呼ばずに閉じる
+
+    store = ScheduleStore(path)
+    try:
+        assert list(store.changes("src", {"S": (HEADER, changed)})) == ["S"]
+        assert store.changes("src", {"S": (HEADER, rows)}) == {}
+    finally:
+        store.close()
+
+
+def test_mark_written_only_saves_given_sheets(store):
+    rows = make_rows(["4月14日"])
+    assert len(store.changes("src", {"A": (HEADER, rows), "B": (HEADER, rows)})) == 2
+    store.mark_written(["A"])
+    assert list(store.changes("src", {"A": (HEADER, rows), "B": (HEADER, rows)})) == ["B"]
+
+
+def test_sources_are_stored_separately(store):
+    rows = make_rows(["4月14日"])
+    written(store, rows)
+    assert list(store.changes("other", {"S": (HEADER, rows)})) == ["S"]
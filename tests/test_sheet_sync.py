@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+import sheet_sync
+from fake_sheets import FakeClient, FakeSpreadsheet
+from sheet_sync import diff_rows, sync_spreadsheet, write_sheets
+
+HEADER = ["日付", "時間", "タイトル", "説明"]
+
+
+def make_rows(days, per_day=48):
+    return [[f"4月{14 + day}日", f"{slot // 2:02d}:{slot % 2 * 30:02d}", f"番組{day}-{slot}", "説明"]
+            for day in range(days) for slot in range(per_day)]
+
+
+def sheet_values(sh, name="S"):
+    rows = sh.values_batch_get([f"'{name}'"])['valueRanges'][0].get('values', [])
+    return [row + [""] * (len(HEADER) - len(row)) for row in rows]
+
+
+def synced(rows):
+    sh = FakeSpreadsheet()
+    sync_spreadsheet(sh, {"S": (HEADER, rows)})
+    sh.calls.clear()
+    return sh
+
+
+def test_unchanged_rows_issue_no_writes():
+    rows = make_rows(2)
+    row_ops, ranges, stats = diff_rows([HEADER] + rows, [HEADER] + rows, len(HEADER))
+    assert (row_ops, ranges, stats['rewritten']) == ([], [], 0)
+
+
+def test_insert_near_top_shifts_rows_instead_of_rewriting():
+    rows = make_rows(7)
+    sh = synced(rows)
+    desired = rows[:3] + [["4月14日", "01:15", "特番", ""]] + rows[3:]
+    stats = sync_spreadsheet(sh, {"S": (HEADER, desired)})["S"]
+    assert stats['rewritten'] == 1
+    assert stats['added'] == 1
+    assert sheet_values(sh) == [HEADER] + desired
+
+
+def test_daily_rollover_only_writes_the_new_day():
+    rows = make_rows(8)
+    sh = synced(rows[:336])
+    desired = rows[48:]
+    stats = sync_spreadsheet(sh, {"S": (HEADER, desired)})["S"]
+    assert stats['rewritten'] == 48
+    assert (stats['added'], stats['removed'], stats['updated']) == (48, 48, 0)
+    assert sheet_values(sh) == [HEADER] + desired
+
+
+def test_changed_content_with_same_key_is_updated_in_place():
+    rows = make_rows(1)
+    sh = synced(rows)
+    desired = [list(row) for row in rows]
+    desired[10][3] = "新しい説明"
+    row_ops, ranges, stats = diff_rows(sheet_values(sh), [HEADER] + desired, len(HEADER))
+    assert row_ops == []
+    assert ranges == [{'range': "A12:D12", 'values': [desired[10]]}]
+    assert stats['updated'] == 1
+
+
+def test_sync_is_batched_into_single_calls():
+    rows = make_rows(3)
+    sh = synced(rows)
+    desired = rows[1:] + [["4月20日", "00:00", "新番組", ""]]
+    desired.insert(50, ["4月15日", "00:45", "挿入", ""])
+    sync_spreadsheet(sh, {"S": (HEADER, desired)})
+    assert sh.calls == {"fetch_sheet_metadata": 1, "values_batch_get": 1,
+                        "batch_update": 1, "values_batch_update": 1}
+
+
+def test_write_sheets_opens_spreadsheet_without_extra_calls(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(sheet_sync, "authorize", lambda service_account_file: client)
+    rows = make_rows(3)
+    write_sheets("sheet-id", "credentials.json", {"S": (HEADER, rows)})
+    sh = client.spreadsheet("sheet-id")
+    assert sum(sh.calls.values()) == 3  # 新規シートは現在値を取得しない
+    sh.calls.clear()
+
+    desired = rows[1:] + [["4月20日", "00:00", "新番組", ""]]
+    desired.insert(50, ["4月15日", "00:45", "挿入", ""])
+    write_sheets("sheet-id", "credentials.json", {"S": (HEADER, desired)})
+    assert sh.calls == {"fetch_sheet_metadata": 1, "values_batch_get": 1,
+                        "batch_update": 1, "values_batch_update": 1}
+    assert sheet_values(sh) == [HEADER] + desired
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_edits_converge_to_desired_rows(seed):
+    rng = random.Random(seed)
+    rows = [[f"d{i // 5}", f"t{i % 5}", f"title{rng.randint(0, 3)}", f"x{rng.randint(0, 2)}"]
+            for i in range(rng.randint(0, 40))]
+    sh = synced(rows)
+    desired = [list(row) for row in rows]
+    for _ in range(rng.randint(0, 8)):
+        op = rng.choice("idu")
+        if op == "i":
+            desired.insert(rng.randint(0, len(desired)), [f"n{rng.randint(0, 9)}", "t", "new", ""])
+        elif op == "d" and desired:
+            desired.pop(rng.randrange(len(desired)))
+        elif op == "u" and desired:
+            desired[rng.randrange(len(desired))][3] = "changed"
+    sync_spreadsheet(sh, {"S": (HEADER, desired)})
+    assert sheet_values(sh) == [HEADER] + desired
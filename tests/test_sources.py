@@ -0,0 +1,48 @@
+import os
+from datetime import date, datetime
+
+import pytest
+
+import animax  # noqa: F401  取得元を登録する
+import wowow_schedule  # noqa: F401  取得元を登録する
+from sources import FetchContext, registered_sources
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PAGES = {
+    "wowow": ("wowow_20250414.html", date(2025, 4, 14)),
+    "animax": ("animax_schedule_weekly.html", date(2024, 12, 30)),
+}
+
+
+def load(name):
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("source", registered_sources(""), ids=lambda source: source.name)
+@pytest.mark.parametrize("as_datetime", [False, True])
+def test_parse_takes_page_date(source, as_datetime):
+    name, page_date = PAGES[source.name]
+    when = datetime.combine(page_date, datetime.min.time()) if as_datetime else page_date
+    programs = source.parse(load(name), when)
+    assert programs
+    assert {program.channel for program in programs} <= set(source.sheet_names)
+    sheets = source.build_sheets(programs)
+    assert sheets and all(len(rows) > 0 for _, rows in sheets.values())
+
+
+def test_parse_animax_starts_at_given_date():
+    source, = registered_sources("animax")
+    programs = source.parse(load("animax_schedule_weekly.html"), date(2025, 1, 1))
+    assert [(program.date, program.title) for program in programs] == [
+        ("1月1日(水)", "新春 異世界ぐらしの記録"), ("1月2日(木)", "テニスの天才")]
+
+
+def test_sources_use_context_session(monkeypatch):
+    session = object()
+    seen = []
+    monkeypatch.setattr(wowow_schedule, "fetch_schedule_multiple_days",
+                        lambda *args, **kwargs: seen.append(kwargs["session"]) or [])
+    source, = registered_sources("wowow")
+    source.fetch(FetchContext(driver_pool=None, session=session))
+    assert seen == [session]
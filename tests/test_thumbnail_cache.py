@@ -0,0 +1,73 @@
+import animax
+import thumbnail_cache
+from thumbnail_cache import ThumbnailCache
+
+DAY = 24 * 60 * 60
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(thumbnail_cache.time, "time", clock)
+    return ThumbnailCache(str(tmp_path / "cache.sqlite3"), ttl=14 * DAY, negative_ttl=2 * DAY)
+
+
+def test_missing_thumbnail_is_cached_for_negative_ttl(tmp_path, monkeypatch):
+    clock = Clock()
+    cache = make_cache(tmp_path, monkeypatch, clock)
+    cache.set("https://example.com/a", "https://example.com/a.jpg")
+    cache.set("https://example.com/b", "")
+    cache.set("https://example.com/c", None)
+
+    assert cache.get("https://example.com/a") == "https://example.com/a.jpg"
+    assert cache.get("https://example.com/b") == ""
+    assert cache.get("https://example.com/c") is None
+
+    clock.now += 3 * DAY
+    assert cache.get("https://example.com/a") == "https://example.com/a.jpg"
+    assert cache.get("https://example.com/b") is None
+
+
+def test_close_prunes_expired_negative_entries(tmp_path, monkeypatch):
+    clock = Clock()
+    cache = make_cache(tmp_path, monkeypatch, clock)
+    cache.set("https://example.com/a", "https://example.com/a.jpg")
+    cache.set("https://example.com/b", "")
+    clock.now += 3 * DAY
+    cache.close()
+
+    reopened = make_cache(tmp_path, monkeypatch, clock)
+    rows = reopened._conn.execute("SELECT program_url FROM thumbnails").fetchall()
+    assert rows == [("https://example.com/a",)]
+
+
+def test_pages_without_thumbnail_are_not_refetched(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch, Clock())
+    pages = {"https://example.com/a": "https://example.com/a.jpg", "https://example.com/b": "",
+             "https://example.com/c": None}  # None: ページ自体を取得できなかった
+    fetched = []
+
+    def fake_fetch(session, limiter, url):
+        fetched.append(url)
+        return pages[url]
+    monkeypatch.setattr(animax, "fetch_thumbnail_url_http", fake_fetch)
+    browser_urls = []
+    monkeypatch.setattr(animax, "fetch_thumbnail_urls_with_tabs",
+                        lambda driver, urls, **kwargs: browser_urls.extend(urls) or {})
+
+    result = animax.fetch_thumbnail_urls(object(), list(pages), cache=cache, session=object())
+    assert result == {"https://example.com/a": "https://example.com/a.jpg",
+                      "https://example.com/b": "", "https://example.com/c": ""}
+    assert browser_urls == ["https://example.com/c"]
+
+    fetched.clear()
+    browser_urls.clear()
+    animax.fetch_thumbnail_urls(object(), list(pages), cache=cache, session=object())
+    assert fetched == ["https://example.com/c"]
+    assert browser_urls == ["https://example.com/c"]
@@ -0,0 +1,109 @@
+import logging
+import sqlite3
+import threading
+import time
+
+import metrics
+
+# ========== 設定 ==========
+DEFAULT_TTL = 14 * 24 * 60 * 60  # キャッシュの有効期限（秒）
+DEFAULT_NEGATIVE_TTL = 2 * 24 * 60 * 60  # サムネが無かったページを取得し直すまでの秒数
+DEFAULT_MAX_ENTRIES = 5000  # これを超えたら最終参照が古いものから削除
+COMMIT_EVERY = 20  # この件数を保存するごとにディスクへ書き出す（途中で落ちても再実行時に再利用できる）
+
+
+class ThumbnailCache:
+    """
+    番組URL → サムネURL を保存するSQLiteベースの永続キャッシュ
+    有効期限(TTL)と、最終参照時刻によるLRU削除に対応する
+    ページは読み込めたがサムネが無かった番組は空文字として保存し、negative_ttl 秒の間は取得し直さない
+    取得結果は COMMIT_EVERY 件ごとに書き出すので、実行途中のチェックポイントも兼ねる
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, negative_ttl=DEFAULT_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = min(negative_ttl, ttl)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS thumbnails ("
+            " program_url TEXT PRIMARY KEY,"
+            " thumbnail_url TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, program_url):
+        """キャッシュされたサムネURLを返す（サムネが無いと記録済みなら空文字・存在しない・期限切れなら None）"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT thumbnail_url, fetched_at FROM thumbnails WHERE program_url = ?",
+                (program_url,),
+            ).fetchone()
+            if row is None or now - row[1] > (self.ttl if row[0] else self.negative_ttl):
+                self.misses += 1
+                metrics.incr("thumbnail_cache.misses")
+                return None
+            self._conn.execute(
+                "UPDATE thumbnails SET accessed_at = ? WHERE program_url = ?",
+                (now, program_url),
+            )
+            self.hits += 1
+            metrics.incr("thumbnail_cache.hits")
+            return row[0]
+
+    def set(self, program_url, thumbnail_url):
+        """
+        サムネURLをキャッシュに保存する
+        空文字は「ページにサムネが無かった」として保存し、None（取得自体の失敗）は保存しない
+        """
+        if thumbnail_url is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO thumbnails (program_url, thumbnail_url, fetched_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (program_url, thumbnail_url, now, now),
+            )
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_EVERY:
+                self._commit()
+
+    def checkpoint(self):
+        """保存済みのエントリをディスクに書き出す"""
+        with self._lock:
+            self._commit()
+
+    def _commit(self):
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        """期限切れ・上限超過のエントリを削除してから保存して閉じる"""
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                "DELETE FROM thumbnails WHERE fetched_at < ? OR (thumbnail_url = '' AND fetched_at < ?)",
+                (now - self.ttl, now - self.negative_ttl),
+            )
+            self._conn.execute(
+                "DELETE FROM thumbnails WHERE program_url NOT IN ("
+                " SELECT program_url FROM thumbnails ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+            self._conn.close()
+
+    def log_stats(self):
+        """ヒット・ミス件数をログに出力する"""
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        logging.info(f"サムネキャッシュ: ヒット {self.hits} 件 / ミス {self.misses} 件 (ヒット率 {rate:.1f}%)")
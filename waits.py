@@ -0,0 +1,134 @@
+import logging
+import time
+import uuid
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import metrics
+
+# ========== 設定 ==========
+POLL_INTERVAL = 0.1  # 秒
+CLICK_CHANGE_TIMEOUT = 3  # クリック後にDOMの変化を待つ最大秒数
+NETWORK_IDLE_TIME = 0.5  # この秒数リソース読み込みが増えなければアイドルとみなす
+
+# 指定要素以下の要素の追加・削除と要素内スクロールを数えるMutationObserverを仕掛けるスクリプト
+# （属性・テキストの書き換えはアニメーションやタイマーでも常に起きるため数えない）
+_OBSERVE_JS = """
+const target = document.querySelector(arguments[0]);
+const key = arguments[1];
+if (!target) { return false; }
+window[key] = 0;
+const bump = () => { window[key] += 1; };
+const observer = new MutationObserver((mutations) => { window[key] += mutations.length; });
+observer.observe(target, {childList: true, subtree: true});
+target.addEventListener('scroll', bump, {passive: true});
+window[key + '_stop'] = () => {
+    observer.disconnect();
+    target.removeEventListener('scroll', bump);
+};
+return true;
+"""
+
+_NETWORK_STATE_JS = """
+if (document.readyState !== 'complete') { return -1; }
+return performance.getEntriesByType('resource').length;
+"""
+
+
+def wait_for_selector(driver, css, timeout=20):
+    """css に一致する要素が現れるまで待つ"""
+    return WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, css))
+    )
+
+
+def wait_for_network_idle(driver, idle_time=NETWORK_IDLE_TIME, timeout=10):
+    """
+    ページの読み込みが完了し、idle_time 秒間新しいリソース取得が発生しなくなるまで待つ
+    タイムアウトした場合は False を返す
+    """
+    deadline = time.monotonic() + timeout
+    last_count = None
+    last_change = time.monotonic()
+    with metrics.timed("wait.network_idle"):
+        while time.monotonic() < deadline:
+            count = driver.execute_script(_NETWORK_STATE_JS)
+            now = time.monotonic()
+            if count != last_count or count < 0:
+                last_count = count
+                last_change = now
+            elif now - last_change >= idle_time:
+                return True
+            time.sleep(POLL_INTERVAL)
+    logging.debug("ネットワークのアイドル待ちがタイムアウトしました。")
+    return False
+
+
+def observe_changes(driver, css):
+    """css の要素に変更監視を仕掛け、監視キーを返す（要素が無ければ None）"""
+    key = f"__scheduleBotChanges_{uuid.uuid4().hex}"
+    return key if driver.execute_script(_OBSERVE_JS, css, key) else None
+
+
+def changes_since(driver, key):
+    """observe_changes() 以降に観測された変更の数を返す"""
+    return driver.execute_script("return window[arguments[0]] || 0;", key)
+
+
+def stop_observing(driver, key):
+    """変更監視を解除する"""
+    driver.execute_script("const stop = window[arguments[0] + '_stop']; if (stop) { stop(); }", key)
+
+
+def wait_for_change(driver, key, timeout=CLICK_CHANGE_TIMEOUT):
+    """監視中の要素に変更が起きるまで待つ（タイムアウトした場合は False）"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+            lambda d: changes_since(d, key) > 0
+        )
+        return True
+    except TimeoutException:
+        return False
+
+
+def click_until_changed(driver, element, watch_css, timeout=CLICK_CHANGE_TIMEOUT):
+    """
+    element を1回クリックし、watch_css の要素の中身（子要素の追加・削除またはスクロール位置）が変化するまで待つ
+    変化しなかった場合のみ ActionChains で再度クリックする
+    変化を確認できたら True を返す
+    """
+    clicks = [
+        ("JavaScript", lambda: driver.execute_script("arguments[0].click();", element), "click_js_error.png"),
+        ("ActionChains", lambda: ActionChains(driver).move_to_element(element).click().perform(),
+         "click_actionchains_error.png"),
+    ]
+
+    key = observe_changes(driver, watch_css)
+    if key is None:
+        logging.warning(f"監視対象の要素 '{watch_css}' が見つからないため、ネットワークのアイドルを待ちます。")
+
+    try:
+        for method, click, screenshot in clicks:
+            try:
+                click()
+                metrics.incr("wait.clicks")
+                logging.debug(f"{method}を使用してクリックしました。")
+            except Exception as e:
+                logging.warning(f"{method}クリックに失敗しました: {e}")
+                driver.save_screenshot(screenshot)
+                logging.debug(f"スクリーンショットを '{screenshot}' として保存しました。")
+                continue
+
+            with metrics.timed("wait.click_change"):
+                changed = wait_for_change(driver, key, timeout) if key else wait_for_network_idle(driver)
+            if changed:
+                return True
+            logging.debug(f"{method}クリック後に変化が見られませんでした。")
+        return False
+    finally:
+        if key:
+            stop_observing(driver, key)
@@ -2,40 +2,44 @@ import logging
 import time
 from datetime import datetime, timedelta
 import os
-import gspread
-import logging
-
-def find_chrome_binary():
-    """Google Chromeのバイナリパスを自動検出する"""
-    candidates = ["/usr/bin/google-chrome-stable", "/usr/bin/google-chrome"]
-    for path in candidates:
-        if os.path.exists(path):
-            logging.info(f"Chrome binary found: {path}")
-            return path
-    raise FileNotFoundError("Google Chrome binary not found.")
-
-chrome_binary = find_chrome_binary()
+from urllib.parse import urljoin
 
 # Python側の日付処理をJSTに固定
 os.environ['TZ'] = 'Asia/Tokyo'
 time.tzset()
 
-from oauth2client.service_account import ServiceAccountCredentials
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 
+import metrics
+from browser import DriverPool
+from http_client import create_session, fetch_html, map_concurrently
+from parsers import parse_wowow_cells
+from programs import Program, sheet_rows
+from resource_blocking import page_report
+from sheet_sync import write_sheets
+from sources import Source, register
+from waits import wait_for_selector
+
 # ========== 設定 ==========
 SPREADSHEET_ID = "1lkshTdrk5gVUpSUe9-xTpq438xQQh_SBGcKXfBboH7s"
 SERVICE_ACCOUNT_FILE = "credentials1.json"  # JSON認証情報ファイルのパス
 SHEET_NAMES = ["WOWOWプライム", "WOWOWライブ", "WOWOWシネマ"]
+SHEET_HEADER = ["日付", "時間", "タイトル", "説明", "画像URL"]
+SHEET_COLUMNS = ("date", "time", "title", "description", "image_url")  # SHEET_HEADER に対応する Program の属性
+SCHEDULE_URL = "https://www.wowow.co.jp/schedule/{date}"
+# 番組セルが描画されたことを確認するためのセレクタ
+PROGRAM_CELL_SELECTOR = '.mdl__program-table td.__prime, .mdl__program-table td.__live, .mdl__program-table td.__cinema'
+# 取得方式: "http"（ブラウザ不要・取得できなければseleniumにフォールバック）または "selenium"
+FETCH_BACKEND = os.environ.get("WOWOW_FETCH_BACKEND", "http")
+FETCH_DAYS = int(os.environ.get("WOWOW_DAYS", "1"))  # 取得日数
+# 各日のURLを先に組み立てて並列取得する（"0" で翌日リンクを順にたどる従来方式）
+PARALLEL_FETCH = os.environ.get("WOWOW_PARALLEL", "1") != "0"
+HTTP_WORKERS = int(os.environ.get("WOWOW_HTTP_WORKERS", "4"))  # HTTP取得の同時接続数
+BROWSER_WORKERS = int(os.environ.get("WOWOW_BROWSER_WORKERS", "2"))  # 同時に起動するChromeの数
 
 # ========== ログ設定 ==========
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s [%(levelname)s] %(message)s")
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "DEBUG"), format="%(asctime)s [%(levelname)s] %(message)s")
 
 CHANNEL_MAP = {
     "__prime": "WOWOWプライム",
@@ -44,65 +48,97 @@ CHANNEL_MAP = {
 }
 
 # ========== 番組表取得 ==========
-def fetch_schedule_multiple_days(start_date, days=1):
-    """指定された開始日から指定された日数分の番組表を取得する"""
-    url = f"https://www.wowow.co.jp/schedule/{start_date}"
-    logging.debug(f"初期アクセス: {url}")
+def parse_schedule_page(html, display_date):
+    """番組表ページのHTMLから番組データのリストを取り出す"""
+    with metrics.timed("wowow.parse"):
+        programs = build_programs(parse_wowow_cells(html), display_date)
+    metrics.incr("wowow.programs", len(programs))
+    return programs
+
+def build_programs(program_cells, display_date):
+    """番組セルの生データから番組データのリストを組み立てる"""
+    programs = []
+    for cell in program_cells:
+        try:
+            program = Program(
+                channel=CHANNEL_MAP.get(cell['channel_class'], "不明"),
+                date=display_date,
+                time=cell['time'],
+                title=cell['title'],
+                description=cell['description'],
+                image_url=cell['image'],
+            )
+            logging.debug(f"番組取得: [{program.channel}] {program.date} {program.time} - {program.title}")
+            programs.append(program)
+        except Exception as e:
+            logging.warning(f"番組データ解析エラー: {e}")
+    return programs
+
+def find_next_day_url(html, base_url):
+    """番組表ページのHTMLから翌日ページへのリンクを取り出す"""
+    soup = BeautifulSoup(html, "html.parser")
+    next_link = soup.select_one('a.btn__more-view')
+    if next_link and next_link.has_attr('href'):
+        return urljoin(base_url, next_link['href'])
+    return None
+
+def fetch_schedule_http(start_date, days=1, session=None):
+    """
+    ブラウザを使わずにHTTPで番組表を取得する（ページから番組を取り出せなければ空リスト）
+    session を省略した場合はこの取得用に作成して閉じる
+    """
+    url = SCHEDULE_URL.format(date=start_date)
+    current_date_obj = datetime.strptime(start_date, "%Y%m%d")
+    all_programs = []
+
+    own_session = session is None
+    if own_session:
+        session = create_session(pool_size=1)
+    try:
+        for day in range(days):
+            logging.debug(f"[{day+1}日目] HTTP取得: {url}")
+            html = fetch_html(session, url)
+            programs = parse_schedule_page(html, current_date_obj.strftime("%Y/%m/%d"))
+            if not programs:
+                logging.warning(f"HTTP取得したページから番組を取り出せませんでした: {url}")
+                return []
+            all_programs.extend(programs)
+
+            # 次の日のために日付を1日進める
+            current_date_obj += timedelta(days=1)
 
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--lang=ja-JP')
-    options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                       'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.7049.84 Safari/537.36')
-    options.binary_location = chrome_binary
+            # 最終日以外なら、翌日のリンクに移動
+            if day < days - 1:
+                next_url = find_next_day_url(html, url)
+                if not next_url:
+                    logging.warning("翌日リンク取得エラー（最終日？）")
+                    break
+                url = next_url
+    finally:
+        if own_session:
+            session.close()
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    # ブラウザのタイムゾーンをJSTに設定
-    driver.execute_cdp_cmd('Emulation.setTimezoneOverride', {"timezoneId": "Asia/Tokyo"})
+    return all_programs
+
+def fetch_schedule_selenium(start_date, days, driver_pool):
+    """ヘッドレスChromeで番組表を取得する"""
+    url = SCHEDULE_URL.format(date=start_date)
+    logging.debug(f"初期アクセス: {url}")
 
     all_programs = []
     # 文字列の開始日からdatetimeオブジェクトを生成
     current_date_obj = datetime.strptime(start_date, "%Y%m%d")
 
-    try:
+    with driver_pool.driver() as driver:
         driver.get(url)
         for day in range(days):
             logging.debug(f"[{day+1}日目] ページ読み込み待機...")
-            WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "mdl__program-table"))
-            )
-
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            program_cells = soup.select('.mdl__program-table td.__prime, .mdl__program-table td.__live, .mdl__program-table td.__cinema')
+            with metrics.timed("wowow.page_load"):
+                wait_for_selector(driver, PROGRAM_CELL_SELECTOR)
+            page_report(driver, "wowow")
 
             display_date = current_date_obj.strftime("%Y/%m/%d")
-
-            for cell in program_cells:
-                try:
-                    time_tag = cell.select_one('.__time')
-                    title_tag = cell.select_one('.__title-text')
-                    img_tag = cell.select_one('.__thumb img')
-                    desc_tag = cell.select_one('.__lead p')
-
-                    channel_class = next((cls for cls in cell["class"] if cls in CHANNEL_MAP), "不明")
-                    channel_name = CHANNEL_MAP.get(channel_class, "不明")
-                    
-                    raw_time = time_tag.text.strip() if time_tag else ''
-
-                    program = {
-                        'チャンネル': channel_name,
-                        '日付': display_date,
-                        '時間': raw_time,
-                        'タイトル': title_tag.text.strip() if title_tag else '',
-                        '画像URL': img_tag['src'].strip() if img_tag and img_tag.has_attr('src') else '',
-                        '説明': desc_tag.text.strip() if desc_tag else '',
-                    }
-                    logging.debug(f"番組取得: [{program['チャンネル']}] {program['日付']} {program['時間']} - {program['タイトル']}")
-                    all_programs.append(program)
-                except Exception as e:
-                    logging.warning(f"番組データ解析エラー: {e}")
+            all_programs.extend(parse_schedule_page(driver.page_source, display_date))
 
             # 次の日のために日付を1日進める
             current_date_obj += timedelta(days=1)
@@ -113,76 +149,178 @@ def fetch_schedule_multiple_days(start_date, days=1):
                     next_link = driver.find_element(By.CSS_SELECTOR, 'a.btn__more-view')
                     next_link_url = next_link.get_attribute('href')
                     logging.debug(f"翌日リンクへ移動: {next_link_url}")
+                    # 読み込み完了はループ先頭で番組セルの出現を待って確認する
                     driver.get(next_link_url)
-                    time.sleep(3) # ページの読み込み待ち
                 except Exception as e:
                     logging.warning(f"翌日リンク取得エラー（最終日？）: {e}")
                     break
+
+    return all_programs
+
+def schedule_dates(start_date, days):
+    """開始日(YYYYMMDD)から days 日分の日付のリストを返す"""
+    start_date_obj = datetime.strptime(start_date, "%Y%m%d")
+    return [start_date_obj + timedelta(days=i) for i in range(days)]
+
+def fetch_day_http(session, date_obj):
+    """1日分の番組表をHTTPで取得する"""
+    url = SCHEDULE_URL.format(date=date_obj.strftime("%Y%m%d"))
+    logging.debug(f"HTTP取得: {url}")
+    html = fetch_html(session, url)
+    return parse_schedule_page(html, date_obj.strftime("%Y/%m/%d"))
+
+def fetch_day_selenium(driver, date_obj):
+    """1日分の番組表をWebDriverで取得する"""
+    url = SCHEDULE_URL.format(date=date_obj.strftime("%Y%m%d"))
+    logging.debug(f"ページ取得: {url}")
+    with metrics.timed("wowow.page_load"):
+        driver.get(url)
+        wait_for_selector(driver, PROGRAM_CELL_SELECTOR)
+    page_report(driver, "wowow")
+    return parse_schedule_page(driver.page_source, date_obj.strftime("%Y/%m/%d"))
+
+def fetch_days_http_parallel(dates, session=None):
+    """
+    複数日の番組表をHTTPで並列取得し、{日付: 番組リスト} を返す
+    session を省略した場合はこの取得用に作成して閉じる
+    """
+    own_session = session is None
+    if own_session:
+        session = create_session(pool_size=HTTP_WORKERS)
+    try:
+        return map_concurrently(lambda date_obj: fetch_day_http(session, date_obj), dates, HTTP_WORKERS)
     finally:
-        driver.quit()
+        if own_session:
+            session.close()
+
+def fetch_days_selenium_parallel(dates, driver_pool):
+    """複数日の番組表をプール内のChromeで分担して取得し、{日付: 番組リスト} を返す"""
+    workers = max(1, min(driver_pool.size, len(dates)))
+    chunks = [tuple(dates[i::workers]) for i in range(workers)]
+
+    def fetch_chunk(chunk):
+        results = {}
+        with driver_pool.driver() as driver:
+            for date_obj in chunk:
+                try:
+                    results[date_obj] = fetch_day_selenium(driver, date_obj)
+                except Exception as e:
+                    logging.warning(f"番組表の取得に失敗しました ({date_obj:%Y/%m/%d}): {e}")
+        return results
+
+    merged = {}
+    for results in map_concurrently(fetch_chunk, chunks, workers).values():
+        merged.update(results or {})
+    return merged
 
+def fetch_schedule_parallel(start_date, days, backend, driver_pool, session=None):
+    """各日のURLを先に組み立てて並列取得し、日付順に結合した番組リストを返す"""
+    dates = schedule_dates(start_date, days)
+
+    results = {}
+    if backend == "http":
+        results = {date_obj: programs for date_obj, programs in fetch_days_http_parallel(dates, session).items() if programs}
+
+    missing = [date_obj for date_obj in dates if date_obj not in results]
+    if missing:
+        if backend == "http":
+            logging.info(f"HTTPで取得できなかった {len(missing)} 日分をSeleniumで取得します。")
+        results.update(fetch_days_selenium_parallel(missing, driver_pool))
+
+    all_programs = []
+    for date_obj in dates:
+        all_programs.extend(results.get(date_obj) or [])
     return all_programs
 
-# ========== スプレッドシート書き込み ==========
-def write_to_spreadsheet(programs):
-    """取得した番組データをスプレッドシートに書き込む"""
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    creds = ServiceAccountCredentials.from_json_keyfile_name(SERVICE_ACCOUNT_FILE, scope)
-    gc = gspread.authorize(creds)
+def fetch_schedule_multiple_days(start_date, days=1, backend=None, driver_pool=None, session=None):
+    """
+    指定された開始日から指定された日数分の番組表を取得する
+    driver_pool を渡すと、Seleniumが必要な場合にそのプールのChromeを使い回す
+    session を渡すと、HTTPで取得する場合にそのセッションの接続を使い回す
+    """
+    backend = backend or FETCH_BACKEND
+    own_pool = driver_pool is None
+    if own_pool:
+        driver_pool = DriverPool(BROWSER_WORKERS)
 
-    sh = gc.open_by_key(SPREADSHEET_ID)
+    try:
+        if PARALLEL_FETCH:
+            return fetch_schedule_parallel(start_date, days, backend, driver_pool, session)
 
-    # 既存のシートを一度削除し、新しいシートを作成
+        if backend == "http":
+            try:
+                programs = fetch_schedule_http(start_date, days, session)
+                if programs:
+                    return programs
+            except Exception as e:
+                logging.warning(f"HTTPでの番組表取得に失敗しました: {e}")
+            logging.info("Seleniumでの取得にフォールバックします。")
+        return fetch_schedule_selenium(start_date, days, driver_pool)
+    finally:
+        if own_pool:
+            driver_pool.close()
+
+# ========== スプレッドシート書き込み ==========
+def build_sheets(programs):
+    """
+    番組データをチャンネルごとのシートに振り分け、{シート名: (ヘッダー, 行のリスト)} を返す
+    """
+    channels = {prog.channel for prog in programs}
+    sheets = {}
     for sheet_name in SHEET_NAMES:
-        try:
-            worksheet_to_delete = sh.worksheet(sheet_name)
-            sh.del_worksheet(worksheet_to_delete)
-            logging.info(f"シート '{sheet_name}' を削除しました。")
-            time.sleep(2)
-        except gspread.WorksheetNotFound:
-            logging.info(f"シート '{sheet_name}' は存在しないため、削除をスキップします。")
-        except Exception as e:
-            logging.error(f"シート '{sheet_name}' の削除中にエラー: {e}")
-            pass
-        
-        # 新しいシートを作成してヘッダーを書き込む
-        sheet = sh.add_worksheet(title=sheet_name, rows="1000", cols="10")
-        sheet.append_row(["日付", "時間", "タイトル", "説明", "画像URL"])
-        logging.info(f"シート '{sheet_name}' を作成し、ヘッダーを書き込みました。")
-        time.sleep(2)
-
-    # チャンネルごとにデータを振り分け
-    separated = {"WOWOWプライム": [], "WOWOWライブ": [], "WOWOWシネマ": []}
-    for prog in programs:
-        if prog['チャンネル'] in separated:
-            separated[prog['チャンネル']].append([prog['日付'], prog['時間'], prog['タイトル'], prog['説明'], prog['画像URL']])
-    
-    # 各シートにデータを一括で書き込み
-    for sheet_name, data in separated.items():
-        if not data:
+        if sheet_name not in channels:
             logging.info(f"シート '{sheet_name}' に書き込むデータはありません。")
             continue
-        try:
-            sheet = sh.worksheet(sheet_name)
-            # ヘッダーがあるのでA2から書き込み
-            sheet.update(f"A2:E{len(data)+1}", data)
-            logging.info(f"✅ {sheet_name} に {len(data)} 件書き込み完了")
-            time.sleep(2)
-        except Exception as e:
-            logging.error(f"シート '{sheet_name}' への書き込み中にエラー: {e}")
+        sheets[sheet_name] = (SHEET_HEADER, sheet_rows(programs, SHEET_COLUMNS, channel=sheet_name))
+    return sheets
+
+def write_to_spreadsheet(programs):
+    """取得した番組データをスプレッドシートに書き込む"""
+    try:
+        # 各シートの現在値と比較し、差分のある範囲だけをまとめて書き換え
+        write_sheets(SPREADSHEET_ID, SERVICE_ACCOUNT_FILE, build_sheets(programs))
+    except Exception as e:
+        logging.error(f"スプレッドシートへの書き込み中にエラー: {e}")
+
+
+# ========== 取得元アダプタ ==========
+@register
+class WowowSource(Source):
+    """WOWOW（CHANNEL_MAP の各チャンネル）の取得元"""
+    name = "wowow"
+    label = "WOWOW"
+    sheet_names = tuple(SHEET_NAMES)
+    sheet_header = SHEET_HEADER
+    sheet_columns = SHEET_COLUMNS
+
+    def fetch(self, context):
+        today = datetime.now().strftime("%Y%m%d")
+        return fetch_schedule_multiple_days(today, days=FETCH_DAYS, driver_pool=context.driver_pool,
+                                            session=context.session)
+
+    def parse(self, html, date):
+        return parse_schedule_page(html, date.strftime("%Y/%m/%d"))
+
+    def build_sheets(self, programs):
+        return build_sheets(programs)
 
 
 # ========== メイン処理 ==========
 def main():
     """スクリプトのメイン実行関数"""
     today = datetime.now().strftime("%Y%m%d")
-    # ★★★★★ 修正点: 取得日数を1日に変更 ★★★★★
-    programs = fetch_schedule_multiple_days(today, days=1)
-    if programs:
-        logging.info(f"🎬 取得番組総数: {len(programs)}")
-        write_to_spreadsheet(programs)
-    else:
-        logging.error("番組データを取得できませんでした。")
+    try:
+        # 取得日数は WOWOW_DAYS で指定（既定は1日）
+        with metrics.timed("wowow.fetch"):
+            programs = fetch_schedule_multiple_days(today, days=FETCH_DAYS)
+        if programs:
+            logging.info(f"🎬 取得番組総数: {len(programs)}")
+            with metrics.timed("sheets.write"):
+                write_to_spreadsheet(programs)
+        else:
+            logging.error("番組データを取得できませんでした。")
+    finally:
+        metrics.report()
 
 if __name__ == "__main__":
     main()